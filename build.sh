@@ -0,0 +1,12 @@
+#!/usr/bin/env bash
+# Build de Render (Build Command: ./build.sh)
+set -o errexit
+
+pip install -r requirements.txt
+
+cd src
+# Swiper / PhotoSwipe a static/vendor/ antes de collectstatic: así salen
+# con hash en el manifest y no desde el CDN. Si la descarga falla, falla el build.
+python manage.py vendor_frontend
+python manage.py collectstatic --no-input
+python manage.py check --deploy --fail-level ERROR
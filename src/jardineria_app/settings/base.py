@@ -43,6 +43,8 @@ MIDDLEWARE = [
     'jobs.middleware.anti_bot.BlockBadUserAgentsMiddleware',
     'jobs.middleware.rate_limit.SimpleRateLimitMiddleware',
     'jobs.middleware.ip_blocker.MaliciousIPBlockerMiddleware',
+    'jobs.middleware.replica.ReplicaRoutingMiddleware',
+    'jobs.middleware.crew.CrewMiddleware',
 
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,6 +55,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Requests por minuto por IP (jobs.middleware.rate_limit)
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", 100))
+
 # -------------------------
 # TEMPLATES
 # -------------------------
@@ -93,9 +98,133 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-STATICFILES_STORAGE = (
-    'whitenoise.storage.CompressedManifestStaticFilesStorage'
-)
+# Django 5.1+ ignora STATICFILES_STORAGE: hay que declararlo en STORAGES
+# para que WhiteNoise sirva los archivos con hash y caché de largo plazo.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+# -------------------------
+# CACHE
+# -------------------------
+
+# Compartida entre workers de gunicorn: el rate limit, el bloqueo de IPs y
+# lo calculado en jobs/cache.py valen para toda la instancia.
+#   redis  -> REDIS_URL (requiere el paquete `redis`)
+#   sqlite -> archivo local con incr atómico (un solo host)
+#   file / locmem -> sólo desarrollo (locmem es por proceso)
+
+def cache_config(backend):
+    backends = {
+        "redis": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        },
+        "sqlite": {
+            "BACKEND": "jobs.cache_backends.SQLiteCache",
+            "LOCATION": os.getenv("CACHE_SQLITE_PATH", str(BASE_DIR / ".cache" / "cache.sqlite3")),
+            "OPTIONS": {"MAX_ENTRIES": 50000},
+        },
+        "file": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(BASE_DIR / ".cache" / "django"),
+        },
+        "locmem": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+    }
+    return {"default": backends[backend]}
+
+
+CACHES = cache_config(os.getenv("CACHE_BACKEND", "redis" if os.getenv("REDIS_URL") else "sqlite"))
+
+# -------------------------
+# CACHE DE IMÁGENES (reportes)
+# -------------------------
+
+# Miniaturas del logo y fotos para XLSX/PDF (ver jobs/image_cache.py)
+IMAGE_CACHE = {
+    "DIR": os.getenv("IMAGE_CACHE_DIR", BASE_DIR / ".cache" / "images"),
+    "MAX_BYTES": int(os.getenv("IMAGE_CACHE_MAX_MB", 200)) * 1024 * 1024,
+    "FETCHER": "jobs.image_cache.fetch_image",
+    "WORKERS": 8,
+}
+
+# Informe PDF: fragmentos por mes e informes terminados (ver jobs/reports.py)
+PDF_REPORTS = {
+    "DIR": os.getenv("PDF_REPORTS_DIR", BASE_DIR / ".cache" / "reports"),
+    "FRAGMENTS_MAX_BYTES": int(os.getenv("PDF_FRAGMENTS_MAX_MB", 200)) * 1024 * 1024,
+    "REPORTS_MAX_BYTES": int(os.getenv("PDF_REPORTS_MAX_MB", 100)) * 1024 * 1024,
+}
+
+# -------------------------
+# DATABASE: RÉPLICA DE LECTURA
+# -------------------------
+
+# Alias de la réplica (None = todo al primario), ver jobs/routers.py
+DATABASE_READ_REPLICA = None
+DATABASE_ROUTERS = ["jobs.routers.ReadReplicaRouter"]
+
+# Segundos que un navegador lee del primario después de escribir
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+# -------------------------
+# DATABASE: TIMEOUTS
+# -------------------------
+
+# statement_timeout (ms) por tipo de vista, ver jobs/db.py (sólo PostgreSQL).
+# "command": archive_jobs, backfill_job_summaries, rebuild_tag_stats y
+# seed_jobs (0 = sin límite)
+DB_STATEMENT_TIMEOUTS = {
+    "web": int(os.getenv("DB_TIMEOUT_WEB_MS", 5000)),
+    "export": int(os.getenv("DB_TIMEOUT_EXPORT_MS", 60000)),
+    "command": int(os.getenv("DB_TIMEOUT_COMMAND_MS", 0)),
+}
+
+# -------------------------
+# CUADRILLAS
+# -------------------------
+
+# Cuadrilla cuando el host no trae un subdominio conocido (ver jobs/middleware/crew.py)
+DEFAULT_CREW_SLUG = os.getenv("DEFAULT_CREW", "principal")
+
+# Dominio base de las cuadrillas: sólo norte.<CREW_DOMAIN> elige cuadrilla.
+# Cualquier otro host (p. ej. <app>.onrender.com) usa la por defecto.
+CREW_DOMAIN = os.getenv("CREW_DOMAIN", "").lower()
+
+# Segundos que se cachea la cuadrilla de cada subdominio
+CREW_CACHE_SECONDS = int(os.getenv("CREW_CACHE_SECONDS", 300))
+
+# -------------------------
+# ARCHIVO DE TRABAJOS
+# -------------------------
+
+# Meses que quedan en la tabla caliente; lo anterior lo mueve `archive_jobs`
+JOB_ARCHIVE_HORIZON_MONTHS = int(os.getenv("JOB_ARCHIVE_HORIZON_MONTHS", 24))
+
+# -------------------------
+# PERFILADO DE EXPORTACIONES
+# -------------------------
+
+# Cada exportación loguea filas, bytes y tiempos en "jobs.exports". Una
+# muestra (SAMPLE_RATE) corre con cProfile y tracemalloc (pico de memoria,
+# peak_kb) y, si tarda más de SLOW_MS, el volcado queda en DIR (se
+# guardan los últimos KEEP).
+EXPORT_PROFILING = {
+    "ENABLED": os.getenv("EXPORT_PROFILING", "1") == "1",
+    # Pico de memoria sobre la misma muestra que cProfile (tracemalloc es
+    # lento: fuera de la muestra peak_kb queda vacío). "0" lo apaga.
+    "TRACE_MEMORY": os.getenv("EXPORT_TRACE_MEMORY", "1") == "1",
+    "SLOW_MS": int(os.getenv("EXPORT_SLOW_MS", 2000)),
+    "SAMPLE_RATE": float(os.getenv("EXPORT_PROFILE_SAMPLE_RATE", 0.1)),
+    "DIR": os.getenv("EXPORT_PROFILE_DIR", BASE_DIR / ".cache" / "profiles"),
+    "KEEP": int(os.getenv("EXPORT_PROFILE_KEEP", 20)),
+}
 
 # -------------------------
 # DEFAULT PK
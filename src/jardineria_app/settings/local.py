@@ -2,7 +2,9 @@ from .base import *
 
 DEBUG = True
 
-ALLOWED_HOSTS = ["localhost", "127.0.0.1"]
+ALLOWED_HOSTS = ["localhost", "127.0.0.1", ".localhost"]  # norte.localhost → cuadrilla "norte"
+
+CREW_DOMAIN = os.getenv("CREW_DOMAIN", "localhost").lower()
 
 # -------------------------
 # DATABASE (LOCAL)
@@ -15,6 +17,18 @@ DATABASES = {
     }
 }
 
+# Réplica de lectura simulada con otro archivo SQLite. El alias existe siempre
+# (sin uso no se abre la conexión ni se crea el archivo), así los tests del
+# router la tienen con cualquier runner; las lecturas sólo van a ella con
+# DB_REPLICA_NAME.
+DATABASES["replica"] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": BASE_DIR / os.getenv("DB_REPLICA_NAME", "db_replica.sqlite3"),
+}
+
+if os.getenv("DB_REPLICA_NAME"):
+    DATABASE_READ_REPLICA = "replica"
+
 # -------------------------
 # MEDIA (LOCAL)
 # -------------------------
@@ -22,6 +36,25 @@ DATABASES = {
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# -------------------------
+# STATIC (LOCAL)
+# -------------------------
+
+# Sin manifest: no hace falta correr collectstatic en desarrollo ni en tests
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# -------------------------
+# CACHE (LOCAL)
+# -------------------------
+
+# runserver es un solo proceso: alcanza con locmem (CACHE_BACKEND=sqlite para probar la compartida)
+CACHES = cache_config(os.getenv("CACHE_BACKEND", "locmem"))
+
 # -------------------------
 # LOGGING (DEV)
 # -------------------------
@@ -35,4 +68,8 @@ LOGGING = {
         "handlers": ["console"],
         "level": "DEBUG",
     },
+    # Tiempos y memoria de cada exportación (ver jobs/profiling.py)
+    "loggers": {
+        "jobs.exports": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
 }
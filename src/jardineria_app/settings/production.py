@@ -13,25 +13,72 @@ if render_host:
 
 ALLOWED_HOSTS.append(".onrender.com")
 
+# Cuadrillas por subdominio: CREW_DOMAIN=ejemplo.com acepta norte.ejemplo.com, etc.
+if CREW_DOMAIN:
+    ALLOWED_HOSTS.append(f".{CREW_DOMAIN}")
+
 # -------------------------
 # DATABASE (RENDER)
 # -------------------------
 
+# DB_POOL=1 usa el pool de psycopg 3 (requiere `psycopg[binary,pool]`
+# en lugar de psycopg2). Con pool las conexiones no son persistentes:
+# vuelven al pool al terminar cada request.
+DB_POOL = os.getenv("DB_POOL") == "1"
+
+if DB_POOL:
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        from django.core.exceptions import ImproperlyConfigured
+        raise ImproperlyConfigured(
+            "DB_POOL=1 requiere psycopg 3 con pool: pip install 'psycopg[binary,pool]' "
+            "(requirements.txt sólo trae psycopg2-binary)"
+        )
+
 DATABASES = {
     "default": dj_database_url.parse(
         os.getenv("DATABASE_URL"),
-        conn_max_age=600,
+        conn_max_age=0 if DB_POOL else 600,
+        conn_health_checks=True,
         ssl_require=True,
     )
 }
 
+# Réplica de lectura opcional (listados, detalle, exportaciones)
+if os.getenv("DATABASE_REPLICA_URL"):
+    DATABASES["replica"] = dj_database_url.parse(
+        os.getenv("DATABASE_REPLICA_URL"),
+        conn_max_age=0 if DB_POOL else 600,
+        conn_health_checks=True,
+        ssl_require=True,
+    )
+    DATABASE_READ_REPLICA = "replica"
+
+# statement_timeout de las vistas web desde la conexión: sin round trips por
+# request. Las exportaciones lo suben con SET LOCAL y los comandos largos
+# (archive_jobs, backfill_job_summaries, ...) por sesión (ver jobs/db.py).
+for database in DATABASES.values():
+    database["OPTIONS"]["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUTS['web']}"
+
+if DB_POOL:
+    for database in DATABASES.values():
+        database["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+
 # -------------------------
 # CLOUDINARY
 # -------------------------
 
-DEFAULT_FILE_STORAGE = (
-    "cloudinary_storage.storage.MediaCloudinaryStorage"
-)
+STORAGES = {
+    **STORAGES,
+    "default": {
+        "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
+    },
+}
 
 cloudinary.config(
     cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
@@ -78,4 +125,8 @@ LOGGING = {
         "handlers": ["console"],
         "level": "INFO",
     },
+    # Tiempos y memoria de cada exportación (ver jobs/profiling.py)
+    "loggers": {
+        "jobs.exports": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
 }
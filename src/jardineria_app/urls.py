@@ -2,7 +2,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path
-from jobs.views import JobListView, JobDetailView, export_jobs_csv, export_jobs_xlsx, export_jobs_pdf, health_check, splash
+from jobs.views import JobListView, JobDetailView, export_jobs_csv, export_jobs_xlsx, export_jobs_pdf, export_jobs_analytics, health_check, splash
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -16,6 +16,7 @@ urlpatterns = [
     path('export/csv/', export_jobs_csv, name='export-csv'),
     path('export/xlsx/', export_jobs_xlsx, name='export-xlsx'),
     path("export/pdf/", export_jobs_pdf, name="export_jobs_pdf"),
+    path("export/analytics/", export_jobs_analytics, name="export-analytics"),
 ]
 
 if settings.DEBUG:
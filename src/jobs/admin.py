@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.contrib import admin
+from django.db.models import Sum
 from django.utils.html import format_html
-from .models import Job, JobPhoto, Tag
+from .formatting import hhmm
+from .middleware.crew import lookup_crew
+from .models import ArchivedJob, Crew, Job, JobPhoto, MonthlySummary, Tag
 
 
 class JobPhotoInline(admin.TabularInline):
@@ -18,13 +22,22 @@ class JobPhotoInline(admin.TabularInline):
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
-    list_display = ('date', 'location', 'duration', 'created_at')
-    list_filter = ('date', 'location')
+    list_display = ('date', 'crew', 'location', 'duration', 'photo_count', 'created_at')
+    list_filter = ('crew', 'date', 'location')
     search_fields = ('description',)
+    readonly_fields = ('photo_count', 'has_before', 'has_after', 'tag_names')
     inlines = [JobPhotoInline]
     ordering = ('-date', '-created_at')
     autocomplete_fields = ('tags',)
 
+    def get_changeform_initial_data(self, request):
+        # Job.crew no tiene default: el formulario de alta propone la principal
+        initial = super().get_changeform_initial_data(request)
+        crew = lookup_crew(settings.DEFAULT_CREW_SLUG)
+        if crew is not None:
+            initial.setdefault('crew', crew.pk)
+        return initial
+
     def short_description(self, obj):
         return (obj.description[:50] + '...') if len(obj.description) > 50 else obj.description
 
@@ -39,8 +52,52 @@ class JobPhotoAdmin(admin.ModelAdmin):
         return "No image"
     thumbnail.allow_tags = True
 
+@admin.register(Crew)
+class CrewAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'report_author')
+    prepopulated_fields = {'slug': ('name',)}
+    search_fields = ('name',)
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     search_fields = ('name',)
-    list_display = ('name',)
-    ordering = ('name',)
\ No newline at end of file
+    list_display = ('name', 'job_count', 'total_hours')
+    ordering = ('name',)
+
+    def get_queryset(self, request):
+        # Conteos mantenidos (TagStat) de todas las cuadrillas, en la misma query
+        return super().get_queryset(request).annotate(
+            job_count=Sum('stats__job_count'),
+            total_minutes=Sum('stats__total_minutes'),
+        )
+
+    @admin.display(description='Trabajos', ordering='job_count')
+    def job_count(self, obj):
+        return obj.job_count or 0
+
+    @admin.display(description='Horas', ordering='total_minutes')
+    def total_hours(self, obj):
+        return hhmm(obj.total_minutes)
+
+
+# Archivo: sólo lectura, lo escribe `archive_jobs`
+class ReadOnlyAdmin(admin.ModelAdmin):
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedJob)
+class ArchivedJobAdmin(ReadOnlyAdmin):
+    list_display = ('date', 'crew', 'location', 'duration', 'photo_count', 'archived_at')
+    list_filter = ('crew', 'location')
+    search_fields = ('description', 'tag_names')
+    date_hierarchy = 'date'
+
+
+@admin.register(MonthlySummary)
+class MonthlySummaryAdmin(ReadOnlyAdmin):
+    list_display = ('month', 'crew', 'job_count', 'total_minutes')
+    list_filter = ('crew',)
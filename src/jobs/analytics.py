@@ -0,0 +1,234 @@
+from collections import defaultdict
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractWeekDay, TruncMonth
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from .archive import archive_boundary
+from .formatting import MESES, month_label
+from .models import ArchivedJob, Job, Location, Tag
+
+# ExtractWeekDay: 1 = domingo ... 7 = sábado
+DIAS = ["Domingo", "Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
+
+
+# ==============================
+# Consultas (todo agregado en la base)
+# ==============================
+
+def monthly_stats(jobs):
+    """Horas y cobertura de fotos por mes (resumen desnormalizado de Job)."""
+    return list(
+        jobs
+        .annotate(month=TruncMonth("date"))
+        .values("month")
+        .annotate(
+            total_minutes=Sum("duration"),
+            jobs=Count("id"),
+            with_before=Count("id", filter=Q(has_before=True)),
+            with_after=Count("id", filter=Q(has_after=True)),
+            with_both=Count("id", filter=Q(has_before=True, has_after=True)),
+        )
+        .order_by("month")
+    )
+
+
+def location_stats(jobs):
+    return list(
+        jobs
+        .values("location")
+        .annotate(total_minutes=Sum("duration"), jobs=Count("id"))
+        .order_by("-total_minutes")
+    )
+
+
+def tag_stats(jobs, relation="jobs"):
+    # relation: "jobs" para Job, "archived_jobs" para ArchivedJob
+    tags = Tag.objects.all()
+    if jobs.query.has_filters():
+        # El filtro va antes del annotate: reutiliza el mismo join
+        tags = tags.filter(**{f"{relation}__in": jobs})
+    return list(
+        tags
+        .values("name")
+        .annotate(total_minutes=Sum(f"{relation}__duration"), jobs=Count(relation))
+        .order_by("-total_minutes")
+    )
+
+
+def weekday_month_stats(jobs):
+    return list(
+        jobs
+        .annotate(weekday=ExtractWeekDay("date"), month=ExtractMonth("date"))
+        .values("weekday", "month")
+        .annotate(total_minutes=Sum("duration"))
+        .order_by()
+    )
+
+
+def merge_stats(keys, *groups, order=None):
+    """Suma las filas de Job y ArchivedJob que comparten los campos `keys`."""
+    merged = {}
+    for rows in groups:
+        for row in rows:
+            key = tuple(row[field] for field in keys)
+            if key not in merged:
+                merged[key] = dict(row)
+                continue
+            target = merged[key]
+            for field, value in row.items():
+                if field not in keys:
+                    target[field] = (target[field] or 0) + (value or 0)
+    rows = list(merged.values())
+    if order:
+        rows.sort(key=order)
+    return rows
+
+
+def by_minutes(row):
+    return -(row["total_minutes"] or 0)
+
+
+def history_stats(crew):
+    """Estadísticas de toda la historia de la cuadrilla: tabla caliente + archivo (si hay)."""
+    hot = Job.objects.filter(crew=crew)
+    months = monthly_stats(hot)
+    locations = location_stats(hot)
+    tags = tag_stats(hot)
+    weekday_month = weekday_month_stats(hot)
+    if archive_boundary() is None:
+        return months, locations, tags, weekday_month
+
+    cold = ArchivedJob.objects.filter(crew=crew)
+    return (
+        merge_stats(["month"], months, monthly_stats(cold), order=lambda row: row["month"]),
+        merge_stats(["location"], locations, location_stats(cold), order=by_minutes),
+        merge_stats(["name"], tags, tag_stats(cold, "archived_jobs"), order=by_minutes),
+        merge_stats(["weekday", "month"], weekday_month, weekday_month_stats(cold)),
+    )
+
+
+# ==============================
+# Workbook (modo write-only: no guarda celdas en memoria)
+# ==============================
+
+BOLD = Font(bold=True)
+
+
+def hours(minutes):
+    return round((minutes or 0) / 60, 2)
+
+
+def header(ws, *titles):
+    row = []
+    for title in titles:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = BOLD
+        row.append(cell)
+    ws.append(row)
+
+
+def heat_cell(ws, value, maximum):
+    """Celda con fondo verde proporcional al valor (mapa de calor)."""
+    cell = WriteOnlyCell(ws, value=value or None)
+    if value and maximum:
+        level = int(255 - 180 * value / maximum)
+        cell.fill = PatternFill("solid", fgColor=f"{level:02X}FF{level:02X}")
+    return cell
+
+
+def analytics_stats(crew=None, jobs=None):
+    """(meses, locaciones, etiquetas, día×mes) de la cuadrilla o de un queryset de Job."""
+    if jobs is None:
+        return history_stats(crew)
+    return monthly_stats(jobs), location_stats(jobs), tag_stats(jobs), weekday_month_stats(jobs)
+
+
+def build_analytics_workbook(crew=None, jobs=None, stats=None):
+    """
+    Libro de la cuadrilla (toda su historia) o de un queryset de Job dado.
+    `stats` = analytics_stats() ya calculado (para medir las queries aparte).
+    """
+    if stats is None:
+        stats = analytics_stats(crew, jobs)
+    months, locations, tags, weekday_month = stats
+
+    wb = Workbook(write_only=True)
+    location_names = dict(Location.choices)
+
+    # ==========================
+    # HORAS POR MES
+    # ==========================
+    ws = wb.create_sheet("Horas por mes")
+    header(ws, "Mes", "Trabajos", "Minutos", "Horas")
+    for item in months:
+        month = item["month"]
+        ws.append([month_label(month.year, month.month), item["jobs"], item["total_minutes"], hours(item["total_minutes"])])
+
+    # ==========================
+    # HORAS POR LOCACIÓN
+    # ==========================
+    ws = wb.create_sheet("Horas por locación")
+    header(ws, "Locación", "Trabajos", "Minutos", "Horas")
+    for item in locations:
+        ws.append([
+            location_names.get(item["location"], item["location"]),
+            item["jobs"], item["total_minutes"], hours(item["total_minutes"]),
+        ])
+
+    # ==========================
+    # HORAS POR ETIQUETA
+    # ==========================
+    ws = wb.create_sheet("Horas por etiqueta")
+    header(ws, "Etiqueta", "Trabajos", "Minutos", "Horas")
+    for item in tags:
+        ws.append([f"#{item['name']}", item["jobs"], item["total_minutes"], hours(item["total_minutes"])])
+
+    # ==========================
+    # MAPA DE CALOR: DÍA DE SEMANA × MES
+    # ==========================
+    ws = wb.create_sheet("Día × mes")
+    grid = defaultdict(int)
+    for item in weekday_month:
+        grid[item["weekday"], item["month"]] = item["total_minutes"]
+    maximum = max(grid.values(), default=0)
+
+    header(ws, "Horas", *MESES)
+    for weekday, name in enumerate(DIAS, start=1):
+        ws.append([name] + [
+            heat_cell(ws, hours(grid[weekday, month]), hours(maximum))
+            for month in range(1, 13)
+        ])
+
+    # ==========================
+    # MAPA DE CALOR: AÑO × MES (sale de la misma consulta mensual)
+    # ==========================
+    ws = wb.create_sheet("Año × mes")
+    by_year = defaultdict(dict)
+    for item in months:
+        by_year[item["month"].year][item["month"].month] = item["total_minutes"]
+    maximum = max((item["total_minutes"] for item in months), default=0)
+
+    header(ws, "Horas", *MESES)
+    for year in sorted(by_year):
+        ws.append([year] + [
+            heat_cell(ws, hours(by_year[year].get(month)), hours(maximum))
+            for month in range(1, 13)
+        ])
+
+    # ==========================
+    # COBERTURA DE FOTOS ANTES / DESPUÉS
+    # ==========================
+    ws = wb.create_sheet("Cobertura de fotos")
+    header(ws, "Mes", "Trabajos", "Con antes", "Con después", "Con ambas", "% ambas")
+    for item in months:
+        month = item["month"]
+        ws.append([
+            month_label(month.year, month.month),
+            item["jobs"], item["with_before"], item["with_after"], item["with_both"],
+            round(100 * item["with_both"] / item["jobs"], 1) if item["jobs"] else 0,
+        ])
+
+    return wb
@@ -6,3 +6,8 @@ class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
     verbose_name = _('Trabajos')
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Registra el check de assets vendorizados (`check --deploy` en build.sh)
+        from . import frontend  # noqa: F401
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncMonth
+
+from .cache import bump_month_versions, cached
+from .models import ArchivedJob, Job, MonthlySummary
+from .signals import bulk_changes
+from .tags import TagDelta
+
+
+# ==============================
+# Archivo de trabajos viejos (caliente / frío)
+#
+# Los meses anteriores al horizonte se mueven de Job a ArchivedJob y sus
+# totales quedan congelados en MonthlySummary. Las vistas leen sólo Job;
+# Job.objects.history() une con el archivo cuando el rango lo necesita.
+# ==============================
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_cutoff(months, today=None):
+    """Primer día del mes más viejo que se mantiene en la tabla caliente."""
+    return add_months(month_start(today or date.today()), -months)
+
+
+def compute_archive_boundary():
+    last = ArchivedJob.objects.aggregate(last=Max("date"))["last"]
+    return add_months(last, 1) if last else None
+
+
+def archive_boundary():
+    """Todo lo anterior a esta fecha puede estar archivado (None = archivo vacío)."""
+    return cached("archive_boundary", compute_archive_boundary)
+
+
+def monthly_totals(crew):
+    """
+    [{"month", "total_minutes"}] de la cuadrilla, de más nuevo a más viejo:
+    los meses archivados salen de MonthlySummary, el resto se agrega sobre Job.
+    """
+    hot = (
+        Job.objects
+        .filter(crew=crew)
+        .annotate(month=TruncMonth("date"))
+        .values_list("month")
+        .annotate(total_minutes=Sum("duration"))
+        .order_by()
+    )
+    frozen = MonthlySummary.objects.filter(crew=crew).values_list("month", "total_minutes").order_by()
+
+    # Una sola query; un mes puede estar en ambas si se cargó tarde un trabajo viejo
+    totals = defaultdict(int)
+    for month, minutes in hot.union(frozen, all=True):
+        totals[month] += minutes or 0
+
+    return [
+        {"month": month, "total_minutes": totals[month]}
+        for month in sorted(totals, reverse=True)
+    ]
+
+
+# ==============================
+# Mover trabajos al archivo
+# ==============================
+
+def pending_months(cutoff):
+    """{mes: (trabajos, minutos)} de lo que se archivaría con este corte."""
+    return {
+        item["month"]: (item["jobs"], item["total_minutes"])
+        for item in (
+            Job.objects
+            .filter(date__lt=cutoff)
+            .annotate(month=TruncMonth("date"))
+            .values("month")
+            .annotate(jobs=Count("id"), total_minutes=Sum("duration"))
+            .order_by("month")
+        )
+    }
+
+
+def archive_batch(jobs):
+    """Archiva una lista de Job (con tags y photos precargados) en una transacción."""
+    totals = defaultdict(lambda: [0, 0])
+    for job in jobs:
+        month = totals[job.crew_id, month_start(job.date)]
+        month[0] += job.duration
+        month[1] += 1
+
+    with transaction.atomic():
+        for (crew_id, month), (minutes, count) in totals.items():
+            MonthlySummary.objects.get_or_create(crew_id=crew_id, month=month)
+            MonthlySummary.objects.filter(crew_id=crew_id, month=month).update(
+                total_minutes=F("total_minutes") + minutes,
+                job_count=F("job_count") + count,
+            )
+
+        ArchivedJob.objects.bulk_create([
+            ArchivedJob(
+                original_id=job.pk,
+                crew_id=job.crew_id,
+                date=job.date,
+                location=job.location,
+                duration=job.duration,
+                description=job.description,
+                tag_names=job.tag_names,
+                photo_count=job.photo_count,
+                has_before=job.has_before,
+                has_after=job.has_after,
+                photos=[
+                    {"photo": photo.photo.public_id, "before_after": photo.before_after}
+                    for photo in job.photos.all()
+                ],
+                created_at=job.created_at,
+            )
+            for job in jobs
+        ])
+
+        archived_ids = dict(
+            ArchivedJob.objects
+            .filter(original_id__in=[job.pk for job in jobs])
+            .values_list("original_id", "id")
+        )
+        ArchivedJob.tags.through.objects.bulk_create([
+            ArchivedJob.tags.through(archivedjob_id=archived_ids[job.pk], tag_id=tag.pk)
+            for job in jobs
+            for tag in job.tags.all()
+        ])
+
+        # Las fotos siguen en Cloudinary: sólo se borran las filas
+        Job.objects.filter(pk__in=archived_ids).delete()
+
+        # Los conteos por etiqueta son de los trabajos sin archivar
+        delta = TagDelta()
+        for job in jobs:
+            delta.remove(job.crew_id, [tag.pk for tag in job.tags.all()], job.duration)
+        delta.apply()
+
+    # Esos meses pasan a leerse del archivo: se re-diagraman
+    bump_month_versions(totals.keys())
+
+
+def archive_jobs(cutoff, batch_size=500):
+    """Mueve al archivo los trabajos anteriores a `cutoff`. Devuelve cuántos."""
+    archived = 0
+    with bulk_changes():
+        while True:
+            jobs = list(
+                Job.objects
+                .filter(date__lt=cutoff)
+                .order_by("date", "pk")
+                .prefetch_related("tags", "photos")[:batch_size]
+            )
+            if not jobs:
+                break
+            archive_batch(jobs)
+            archived += len(jobs)
+    return archived
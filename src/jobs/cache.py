@@ -0,0 +1,152 @@
+import math
+import random
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+
+from .routers import primary_reads
+
+# ==============================
+# Métricas (por proceso)
+# ==============================
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def record(event):
+    with _metrics_lock:
+        _metrics[event] += 1
+
+
+def cache_metrics():
+    """hit / miss / stale / early / recompute / wait desde que arrancó el proceso."""
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+# ==============================
+# Versión de los datos
+# ==============================
+
+DATA_VERSION_KEY = "jobs:data-version"
+
+
+def _initial_version():
+    # Si el backend desaloja la clave, la versión nueva no choca con una vieja
+    return int(time.time() * 1000)
+
+
+def data_version():
+    return cache.get_or_set(DATA_VERSION_KEY, _initial_version, timeout=None)
+
+
+def bump_data_version():
+    """Invalida todo lo calculado (lo llaman las señales al cambiar datos)."""
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.add(DATA_VERSION_KEY, _initial_version(), timeout=None)
+
+
+# ==============================
+# Versión por mes (fragmentos del PDF, ver jobs/reports.py)
+# ==============================
+
+def month_version_key(crew_id, month):
+    return f"jobs:month-version:{crew_id}:{month:%Y-%m}"
+
+
+def month_versions(crew_id, months):
+    """{mes: versión} en un solo viaje a la cache (las que faltan se crean)."""
+    keys = {month_version_key(crew_id, month): month for month in months}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, _initial_version(), timeout=None)
+        found[key] = cache.get(key)
+    return {month: found[key] for key, month in keys.items()}
+
+
+def bump_month_versions(pairs):
+    """Invalida los fragmentos de [(crew_id, fecha)] (cualquier día del mes)."""
+    for crew_id, day in set(pairs):
+        key = month_version_key(crew_id, day.replace(day=1))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+
+
+# ==============================
+# Cache con single-flight y stale-while-revalidate
+# ==============================
+
+def cached(name, compute, ttl=300, stale_ttl=600, beta=1.0, lock_timeout=30, wait_timeout=10):
+    """
+    Devuelve compute() cacheado bajo `name` (versionado con los datos).
+
+    - Un solo worker recalcula a la vez: el lock es un `cache.add`.
+    - Vencido el `ttl`, durante `stale_ttl` se sigue sirviendo el valor
+      viejo a los demás mientras el que tiene el lock recalcula.
+    - Expiración temprana probabilística (XFetch): cuanto más caro es
+      compute() y más cerca está el vencimiento, más probable es que un
+      request lo recalcule antes de tiempo, sin que venzan todos juntos.
+    - Si no hay valor ni viejo, los demás esperan al que recalcula.
+    - compute() lee del primario aunque el request use la réplica: el
+      valor queda bajo la versión ya subida, y con lo atrasado de la
+      réplica quedaría así hasta que venza.
+    """
+    key = f"computed:{name}:v{data_version()}"
+    lock_key = f"{key}:lock"
+
+    entry = cache.get(key)
+    if entry is not None:
+        now = time.time()
+        # random() puede dar 0.0: log(0) no existe
+        early = entry["delta"] * beta * -math.log(random.random() or 1e-12)
+        if now + early < entry["expires"]:
+            record("hit")
+            return entry["value"]
+
+        if cache.add(lock_key, 1, lock_timeout):
+            record("early" if now < entry["expires"] else "stale")
+            return _recompute(key, lock_key, compute, ttl, stale_ttl)
+
+        # Otro worker ya está recalculando
+        record("hit" if now < entry["expires"] else "stale")
+        return entry["value"]
+
+    record("miss")
+    if cache.add(lock_key, 1, lock_timeout):
+        return _recompute(key, lock_key, compute, ttl, stale_ttl)
+
+    # Miss sin valor viejo: esperar al que tiene el lock
+    record("wait")
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"]
+
+    # El otro worker murió o tarda demasiado: calcular igual
+    return _recompute(key, lock_key, compute, ttl, stale_ttl)
+
+
+def _recompute(key, lock_key, compute, ttl, stale_ttl):
+    record("recompute")
+    try:
+        start = time.time()
+        with primary_reads():
+            value = compute()
+        delta = time.time() - start
+        cache.set(
+            key,
+            {"value": value, "expires": time.time() + ttl, "delta": delta},
+            timeout=ttl + stale_ttl,
+        )
+        return value
+    finally:
+        cache.delete(lock_key)
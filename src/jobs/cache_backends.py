@@ -0,0 +1,147 @@
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# ==============================
+# Cache compartida en SQLite (un host, varios workers)
+# ==============================
+# Todos los workers de gunicorn abren el mismo archivo. WAL permite leer
+# mientras otro escribe; add/incr son una sola sentencia, así que son
+# atómicos entre procesos (necesario para el rate limit).
+# Los enteros se guardan como INTEGER nativo para poder sumarlos en SQL.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+) WITHOUT ROWID
+"""
+
+# Fracción de los set() que además limpian vencidos / excedentes
+CULL_PROBABILITY = 0.01
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+
+    # ==========================
+    # Conexión (una por hilo y por proceso)
+    # ==========================
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        # Después de un fork (gunicorn) la conexión heredada no sirve
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expiry(self, timeout):
+        # Timestamp absoluto de vencimiento, o None si no vence
+        return self.get_backend_timeout(timeout)
+
+    @staticmethod
+    def _dump(value):
+        # bool es int: sólo los int "de verdad" quedan como INTEGER
+        return value if type(value) is int else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(raw):
+        return raw if isinstance(raw, int) else pickle.loads(raw)
+
+    # ==========================
+    # API de Django
+    # ==========================
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return default if row is None else self._load(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, self._dump(value), self._expiry(timeout)),
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # Sólo pisa la fila existente si está vencida
+        cursor = self._connection().execute(
+            """
+            INSERT INTO cache (key, value, expires) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires
+            WHERE cache.expires IS NOT NULL AND cache.expires <= ?
+            """,
+            (key, self._dump(value), self._expiry(timeout), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            """
+            UPDATE cache SET value = value + ?
+            WHERE key = ? AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?)
+            RETURNING value
+            """,
+            (delta, key, time.time()),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            "UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self._expiry(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute(
+            "SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+
+    def _maybe_cull(self):
+        # Contar filas en cada set sería caro: sólo de vez en cuando
+        if self._cull_frequency and random.random() < CULL_PROBABILITY:
+            conn = self._connection()
+            conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+            (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+            if count > self._max_entries:
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?)",
+                    (count // self._cull_frequency,),
+                )
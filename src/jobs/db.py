@@ -0,0 +1,129 @@
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .routers import current_read_alias, replica_reads
+
+
+# ==============================
+# Statement timeout por vista
+# ==============================
+
+@contextmanager
+def statement_timeout(profile, using=None):
+    """
+    Aplica el statement_timeout del perfil (ver DB_STATEMENT_TIMEOUTS)
+    mientras dura el bloque. Sólo PostgreSQL; en SQLite no hace nada.
+    Por defecto sobre la base de la que lee la vista (primario o réplica).
+
+    El de "web" ya viene de la conexión (OPTIONS, settings/production.py):
+    no cuesta nada. Los demás se suben con SET LOCAL dentro de una
+    transacción, que al terminar lo descarta sin un RESET aparte.
+    """
+    timeout_ms = settings.DB_STATEMENT_TIMEOUTS.get(profile)
+    using = using or current_read_alias()
+    connection = connections[using]
+
+    if (
+        not timeout_ms
+        or timeout_ms == settings.DB_STATEMENT_TIMEOUTS["web"]
+        or connection.vendor != "postgresql"
+    ):
+        yield
+        return
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('statement_timeout', %s, true)", [str(timeout_ms)])
+        yield
+
+
+def with_statement_timeout(profile):
+    """Decorador para vistas función de sólo lectura: @with_statement_timeout("export").
+    También habilita la réplica de lectura (ver jobs/routers.py)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with replica_reads(), statement_timeout(profile):
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def session_statement_timeout(profile, using=DEFAULT_DB_ALIAS):
+    """
+    statement_timeout del perfil para toda la sesión, para los comandos de
+    manage.py: las conexiones ya traen el de "web" (settings/production.py)
+    y un archivo o un recálculo sobre tablas grandes lo superan. SET al
+    entrar y RESET al salir (vuelve al de la conexión), sin tocar las
+    transacciones del comando. 0 = sin límite.
+    """
+    timeout_ms = settings.DB_STATEMENT_TIMEOUTS.get(profile)
+    connection = connections[using]
+
+    if timeout_ms is None or connection.vendor != "postgresql":
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('statement_timeout', %s, false)", [str(timeout_ms)])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("RESET statement_timeout")
+
+
+def with_session_timeout(profile):
+    """Decorador para Command.handle: @with_session_timeout("command")."""
+    def decorator(handle):
+        @wraps(handle)
+        def wrapper(*args, **kwargs):
+            with session_statement_timeout(profile):
+                return handle(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class StatementTimeoutMixin:
+    """Para vistas de clase de sólo lectura (réplica + timeout). El
+    TemplateResponse se renderiza adentro del bloque porque las queries
+    lazy del template también cuentan."""
+    statement_timeout = "web"
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(), statement_timeout(self.statement_timeout):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            return response
+
+
+# ==============================
+# Métricas del pool
+# ==============================
+
+def pool_stats(using=DEFAULT_DB_ALIAS):
+    """
+    Estado del pool de psycopg (Django 5.1+, OPTIONS["pool"]) o None si
+    la base no usa pool. `saturation` es la fracción de conexiones en uso
+    sobre el máximo; `requests_waiting` > 0 indica que el pool no alcanza.
+    """
+    pool = getattr(connections[using], "pool", None)
+    if pool is None:
+        return None
+
+    stats = pool.get_stats()
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    return {
+        "size": stats.get("pool_size", 0),
+        "available": stats.get("pool_available", 0),
+        "max": stats.get("pool_max", pool.max_size),
+        "in_use": in_use,
+        "requests_waiting": stats.get("requests_waiting", 0),
+        "requests_errors": stats.get("requests_errors", 0),
+        "saturation": round(in_use / pool.max_size, 2) if pool.max_size else 0,
+    }
@@ -0,0 +1,114 @@
+from functools import lru_cache
+
+
+# ==============================
+# Formatos compartidos por exportaciones y templates
+#
+# Las duraciones de un trabajo están acotadas: las cadenas se arman una sola
+# vez al importar el módulo y cada fila es un acceso a lista. Los totales
+# (que pueden pasar el límite) caen en una versión memoizada.
+# ==============================
+
+MESES = [
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio",
+    "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre",
+]
+
+# Minutos con cadena precalculada (una semana de trabajo continuo)
+MAX_TABLE_MINUTES = 7 * 24 * 60
+
+
+def _hhmm(minutes):
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+def _short(minutes):
+    hours, rest = divmod(minutes, 60)
+    if hours > 0 and rest > 0:
+        return f"{hours}h {rest}m"
+    if hours > 0:
+        return f"{hours}h"
+    return f"{rest}m"
+
+
+HHMM = [_hhmm(minutes) for minutes in range(MAX_TABLE_MINUTES + 1)]
+SHORT = [_short(minutes) for minutes in range(MAX_TABLE_MINUTES + 1)]
+
+_hhmm_cached = lru_cache(maxsize=4096)(_hhmm)
+_short_cached = lru_cache(maxsize=4096)(_short)
+
+
+def hours_minutes(minutes):
+    """Minutos → (horas, minutos)."""
+    return divmod(minutes or 0, 60)
+
+
+def hhmm(minutes):
+    """Minutos → "2h 05m" (exportaciones)."""
+    minutes = minutes or 0
+    if 0 <= minutes <= MAX_TABLE_MINUTES:
+        return HHMM[minutes]
+    return _hhmm_cached(minutes)
+
+
+def short_duration(minutes):
+    """Minutos → "2h 5m" / "2h" / "5m" (templates)."""
+    minutes = minutes or 0
+    if 0 <= minutes <= MAX_TABLE_MINUTES:
+        return SHORT[minutes]
+    return _short_cached(minutes)
+
+
+def hhmm_column(values):
+    """hhmm() de una columna entera en una pasada."""
+    table, limit = HHMM, MAX_TABLE_MINUTES
+    return [
+        table[value] if value is not None and 0 <= value <= limit else hhmm(value)
+        for value in values
+    ]
+
+
+# ==============================
+# Meses y fechas
+# ==============================
+
+MONTH_LABEL_YEARS = range(2000, 2101)
+
+MONTH_LABELS = {
+    (year, month): f"{MESES[month - 1]} {year}"
+    for year in MONTH_LABEL_YEARS
+    for month in range(1, 13)
+}
+
+
+def month_label(year, month):
+    """(2025, 3) → "Marzo 2025"."""
+    label = MONTH_LABELS.get((year, month))
+    if label is None:
+        label = f"{MESES[month - 1]} {year}"
+    return label
+
+
+def month_label_of(day):
+    return month_label(day.year, day.month)
+
+
+def month_labels(days):
+    """month_label_of() de una columna de fechas."""
+    labels = MONTH_LABELS
+    return [labels.get((day.year, day.month)) or month_label_of(day) for day in days]
+
+
+def date_column(days, fmt):
+    """
+    strftime de una columna de fechas: muchos trabajos comparten el día,
+    así que cada fecha distinta se formatea una sola vez.
+    """
+    seen = {}
+    result = []
+    for day in days:
+        label = seen.get(day)
+        if label is None:
+            label = seen[day] = day.strftime(fmt)
+        result.append(label)
+    return result
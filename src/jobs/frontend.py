@@ -0,0 +1,112 @@
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.checks import Error, Tags, register
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+
+# ==============================
+# Librerías de frontend vendorizadas
+# ==============================
+# Versiones fijas: se descargan con `python manage.py vendor_frontend`
+# a static/vendor/ y se sirven con WhiteNoise (nombre con hash + caché
+# de largo plazo). Mientras el archivo local no exista se usa el CDN.
+
+CDN_BASE = "https://cdn.jsdelivr.net/npm"
+
+VENDOR_ASSETS = {
+    "swiper.css": ("swiper@11.2.10", "swiper-bundle.min.css"),
+    "swiper.js": ("swiper@11.2.10", "swiper-bundle.min.js"),
+    "photoswipe.css": ("photoswipe@5.4.4", "dist/photoswipe.css"),
+    "photoswipe-lightbox.js": ("photoswipe@5.4.4", "dist/photoswipe-lightbox.esm.min.js"),
+    "photoswipe.js": ("photoswipe@5.4.4", "dist/photoswipe.esm.min.js"),
+}
+
+
+def vendor_path(name):
+    package, filename = VENDOR_ASSETS[name]
+    return f"vendor/{package.split('@')[0]}/{filename.rsplit('/', 1)[-1]}"
+
+
+def cdn_url(name):
+    package, filename = VENDOR_ASSETS[name]
+    return f"{CDN_BASE}/{package}/{filename}"
+
+
+@lru_cache(maxsize=None)
+def vendor_url(name):
+    """URL local (con hash) del asset, o la del CDN si no está vendorizado."""
+    path = vendor_path(name)
+    if not finders.find(path):
+        return cdn_url(name)
+    try:
+        return staticfiles_storage.url(path)
+    except ValueError:
+        # Falta en el manifest (collectstatic viejo)
+        return cdn_url(name)
+
+
+@register(Tags.staticfiles, deploy=True)
+def check_vendored_assets(app_configs, **kwargs):
+    """`check --deploy` (build.sh): en producción nada se sirve desde el CDN."""
+    missing = [vendor_path(name) for name in VENDOR_ASSETS if not finders.find(vendor_path(name))]
+    if not missing:
+        return []
+    return [Error(
+        f"Faltan assets vendorizados: {', '.join(missing)}",
+        hint="Correr `python manage.py vendor_frontend` antes de collectstatic.",
+        id="jobs.E001",
+    )]
+
+
+# ==============================
+# Peso de página
+# ==============================
+
+TAG_RE = re.compile(r"<(script|link|img)\b([^>]*)>", re.IGNORECASE)
+ATTR_RE = re.compile(r'([\w-]+)(?:\s*=\s*"([^"]*)")?')
+
+
+def page_assets(html):
+    """
+    Recursos que el navegador pide al cargar la página (no los que se
+    importan después, como PhotoSwipe). Devuelve dicts con tag, url y
+    si bloquea el render.
+    """
+    assets = []
+    for tag, raw_attrs in TAG_RE.findall(html):
+        tag = tag.lower()
+        attrs = {k.lower(): v for k, v in ATTR_RE.findall(raw_attrs)}
+
+        if tag == "link":
+            if attrs.get("rel") not in ("stylesheet", "preload", "icon"):
+                continue
+            url = attrs.get("href")
+            blocking = attrs.get("rel") == "stylesheet"
+        elif tag == "script":
+            url = attrs.get("src")
+            blocking = not ({"defer", "async"} & attrs.keys()) and attrs.get("type") != "module"
+        else:
+            if attrs.get("loading") == "lazy":
+                continue
+            url = attrs.get("src")
+            blocking = False
+
+        if url:
+            assets.append({"tag": tag, "url": url, "blocking": blocking})
+    return assets
+
+
+def local_asset_size(url):
+    """Tamaño en bytes de un archivo estático propio, o None si es externo."""
+    if not url.startswith(settings.STATIC_URL):
+        return None
+    path = url[len(settings.STATIC_URL):]
+    found = finders.find(path)
+    if not found and settings.STATIC_ROOT:
+        candidate = os.path.join(settings.STATIC_ROOT, path)
+        found = candidate if os.path.exists(candidate) else None
+    return os.path.getsize(found) if found else None
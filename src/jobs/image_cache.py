@@ -0,0 +1,155 @@
+import hashlib
+import os
+import tempfile
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps
+
+
+# ==============================
+# Directorio LRU acotado por tamaño
+# ==============================
+
+class LRUDirectory:
+    """
+    Archivos nombrados por el hash de su clave. El mtime marca el último
+    uso: al superar `max_bytes` se borran los menos usados.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+
+    def file_for(self, key, suffix):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.path / digest[:2] / f"{digest}{suffix}"
+
+    def get(self, key, suffixes):
+        for suffix in suffixes:
+            path = self.file_for(key, suffix)
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            return path
+        return None
+
+    def put(self, key, data, suffix):
+        path = self.file_for(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Escritura atómica: otro worker nunca ve un archivo a medias
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+
+        self.evict()
+        return path
+
+    def evict(self):
+        files = []
+        for entry in self.path.glob("*/*"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, entry in sorted(files):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+
+
+# ==============================
+# Fetchers (configurables en IMAGE_CACHE["FETCHER"])
+# ==============================
+
+def fetch_image(source):
+    """Lee una URL (Cloudinary) o un archivo local y devuelve los bytes."""
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source, timeout=15) as res:
+            return res.read()
+    with open(source, "rb") as fh:
+        return fh.read()
+
+
+# ==============================
+# Cache de miniaturas para reportes
+# ==============================
+
+class ImageCache:
+    def __init__(self, directory, max_bytes, fetcher, workers=8):
+        self.storage = LRUDirectory(directory, max_bytes)
+        self.fetcher = fetcher
+        self.workers = workers
+
+    def key(self, source, size):
+        # Un archivo local puede cambiar con el mismo nombre (ej: logo.png)
+        if os.path.exists(source):
+            stat = os.stat(source)
+            source = f"{source}:{stat.st_mtime_ns}:{stat.st_size}"
+        return f"{source}|{size[0]}x{size[1]}"
+
+    def thumbnail(self, source, size):
+        """Ruta a la miniatura lista para el reporte, o None si no se pudo obtener."""
+        return self.thumbnails([source], size).get(source)
+
+    def thumbnails(self, sources, size):
+        """
+        {source: ruta} para todas las imágenes. Las que ya están en disco no
+        se vuelven a decodificar; las que faltan se bajan en paralelo.
+        """
+        found = {}
+        missing = []
+        for source in dict.fromkeys(sources):
+            path = self.storage.get(self.key(source, size), (".jpg", ".png"))
+            if path:
+                found[source] = path
+            else:
+                missing.append(source)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as pool:
+                for source, path in zip(missing, pool.map(lambda s: self.build(s, size), missing)):
+                    if path:
+                        found[source] = path
+        return found
+
+    def build(self, source, size):
+        # Decodificar, reducir y guardar pueden fallar con una foto truncada
+        try:
+            raw = self.fetcher(source)
+            image = ImageOps.exif_transpose(Image.open(BytesIO(raw)))
+            image.thumbnail(size)
+            output = BytesIO()
+            if image.mode in ("RGBA", "LA", "P"):
+                image.save(output, "PNG", optimize=True)
+                suffix = ".png"
+            else:
+                image.convert("RGB").save(output, "JPEG", quality=85, optimize=True)
+                suffix = ".jpg"
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # Una foto que no se puede bajar o decodificar no rompe el reporte
+            return None
+        return self.storage.put(self.key(source, size), output.getvalue(), suffix)
+
+
+@lru_cache(maxsize=None)
+def get_image_cache():
+    config = settings.IMAGE_CACHE
+    return ImageCache(
+        directory=config["DIR"],
+        max_bytes=config["MAX_BYTES"],
+        fetcher=import_string(config["FETCHER"]),
+        workers=config["WORKERS"],
+    )
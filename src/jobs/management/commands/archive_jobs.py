@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.archive import archive_cutoff, archive_jobs, pending_months
+from jobs.db import with_session_timeout
+
+
+class Command(BaseCommand):
+    help = "Mueve los trabajos más viejos que el horizonte a la tabla de archivo"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months", type=int, default=settings.JOB_ARCHIVE_HORIZON_MONTHS,
+            help="Meses que se mantienen en la tabla caliente",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Sólo muestra qué se archivaría")
+
+    # Tablas enteras: sin el statement_timeout de la web
+    @with_session_timeout("command")
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options["months"])
+        months = pending_months(cutoff)
+
+        for month, (jobs, minutes) in months.items():
+            self.stdout.write(f"{month:%Y-%m}: {jobs} trabajos, {minutes} min")
+
+        if options["dry_run"] or not months:
+            self.stdout.write(f"Nada archivado (corte: {cutoff})")
+            return
+
+        archived = archive_jobs(cutoff, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{archived} trabajos archivados (anteriores a {cutoff})"))
@@ -0,0 +1,61 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from jobs.db import with_session_timeout
+from jobs.models import Job, JobPhoto
+
+SUMMARY_FIELDS = ['photo_count', 'has_before', 'has_after', 'tag_names']
+
+
+class Command(BaseCommand):
+    help = "Recalcula el resumen de fotos y etiquetas de cada trabajo"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    # Tablas enteras: sin el statement_timeout de la web
+    @with_session_timeout("command")
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        ids = list(Job.objects.order_by('pk').values_list('pk', flat=True))
+        updated = 0
+
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
+            jobs = list(Job.objects.filter(pk__in=batch_ids))
+
+            # Dos queries agregadas por lote, no una por trabajo
+            photos = {
+                row['job_id']: row
+                for row in JobPhoto.objects
+                .filter(job_id__in=batch_ids)
+                .values('job_id')
+                .annotate(
+                    count=Count('id'),
+                    before=Count('id', filter=Q(before_after='before')),
+                    after=Count('id', filter=Q(before_after='after')),
+                )
+            }
+
+            tags = defaultdict(list)
+            for job_id, name in (
+                Job.tags.through.objects
+                .filter(job_id__in=batch_ids)
+                .order_by('tag__name')
+                .values_list('job_id', 'tag__name')
+            ):
+                tags[job_id].append(name)
+
+            for job in jobs:
+                stats = photos.get(job.pk, {'count': 0, 'before': 0, 'after': 0})
+                job.photo_count = stats['count']
+                job.has_before = stats['before'] > 0
+                job.has_after = stats['after'] > 0
+                job.tag_names = ",".join(tags[job.pk])
+
+            Job.objects.bulk_update(jobs, SUMMARY_FIELDS)
+            updated += len(jobs)
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} trabajos actualizados"))
@@ -0,0 +1,73 @@
+import json
+import statistics
+import tempfile
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+def backends(tmp):
+    options = {
+        "locmem": ("django.core.cache.backends.locmem.LocMemCache", "bench"),
+        "file": ("django.core.cache.backends.filebased.FileBasedCache", f"{tmp}/file"),
+        "sqlite": ("jobs.cache_backends.SQLiteCache", f"{tmp}/cache.sqlite3"),
+    }
+    redis_url = settings.CACHES["default"]["LOCATION"] if "redis" in settings.CACHES["default"]["BACKEND"].lower() else None
+    if redis_url:
+        options["redis"] = ("django.core.cache.backends.redis.RedisCache", redis_url)
+    return options
+
+
+class Command(BaseCommand):
+    help = "Latencia de get/set/incr por backend de cache (locmem, file, sqlite, redis)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operations", type=int, default=2000)
+        parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    def handle(self, *args, **options):
+        n = options["operations"]
+        results = []
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, (backend, location) in backends(tmp).items():
+                cache = import_string(backend)(location, {"TIMEOUT": 300})
+                prefix = uuid.uuid4().hex
+                value = {"count": 1, "start": time.time()}
+
+                timings = {
+                    "set": self.measure(lambda i: cache.set(f"{prefix}:{i}", value), n),
+                    "get": self.measure(lambda i: cache.get(f"{prefix}:{i}"), n),
+                }
+                cache.set(f"{prefix}:counter", 0)
+                timings["incr"] = self.measure(lambda i: cache.incr(f"{prefix}:counter"), n)
+                cache.clear()
+
+                results.append({"backend": name, **{
+                    op: {
+                        "p50_us": statistics.median(values),
+                        "p99_us": sorted(values)[int(len(values) * 0.99) - 1],
+                    }
+                    for op, values in timings.items()
+                }})
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{n} operaciones por tipo (µs, p50 / p99)")
+        for r in results:
+            self.stdout.write(f"  {r['backend']:<7}" + "".join(
+                f"  {op} {r[op]['p50_us']:7.1f} / {r[op]['p99_us']:7.1f}" for op in ("get", "set", "incr")
+            ))
+
+    def measure(self, operation, n):
+        timings = []
+        for i in range(n):
+            start = time.perf_counter()
+            operation(i)
+            timings.append((time.perf_counter() - start) * 1_000_000)
+        return timings
@@ -0,0 +1,84 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+
+from jobs.models import Job
+
+# (nombre, CONN_MAX_AGE, CONN_HEALTH_CHECKS)
+MODES = [
+    ("conexión por request", 0, False),
+    ("persistente", 600, False),
+    ("persistente + health check", 600, True),
+]
+
+
+class Command(BaseCommand):
+    help = "Compara el costo de conexión por request según la configuración de la base"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    def handle(self, *args, **options):
+        original = {
+            "CONN_MAX_AGE": connection.settings_dict["CONN_MAX_AGE"],
+            "CONN_HEALTH_CHECKS": connection.settings_dict["CONN_HEALTH_CHECKS"],
+        }
+        results = []
+
+        try:
+            for name, max_age, health_checks in MODES:
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = max_age
+                connection.settings_dict["CONN_HEALTH_CHECKS"] = health_checks
+                results.append(self.run(name, options["requests"]))
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+
+        # Configuración real (incluye OPTIONS["pool"] si DB_POOL está activo)
+        results.append(self.run("configuración actual", options["requests"]))
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"vendor": connection.vendor, "results": results}, indent=2))
+            return
+
+        self.stdout.write(f"Base: {connection.vendor} · {options['requests']} requests por modo")
+        for r in results:
+            self.stdout.write(
+                f"  {r['mode']:<28} media {r['mean_ms']:.3f} ms · p95 {r['p95_ms']:.3f} ms"
+                f" · {r['connects']} conexiones"
+            )
+
+    def run(self, mode, requests):
+        connects = []
+
+        def on_connect(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        connection_created.connect(on_connect)
+        timings = []
+        try:
+            for _ in range(requests):
+                # Lo mismo que hace el handler de Django al empezar y terminar
+                # cada request (request_started / request_finished)
+                start = time.perf_counter()
+                close_old_connections()
+                list(Job.objects.all()[:10])
+                close_old_connections()
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            connection_created.disconnect(on_connect)
+
+        timings.sort()
+        return {
+            "mode": mode,
+            "requests": requests,
+            "connects": len(connects),
+            "mean_ms": statistics.mean(timings),
+            "p95_ms": timings[int(len(timings) * 0.95) - 1],
+        }
@@ -0,0 +1,249 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs.models import Job, default_crew
+
+# (url name, queries máximas por request). Las exportaciones deben hacer
+# un número fijo de queries sin importar cuántos trabajos haya.
+ENDPOINTS = [
+    ("job-list", 4),
+    ("job-detail", 2),
+    ("export-csv", 2),
+    ("export-xlsx", 2),
+    ("export_jobs_pdf", 4),
+    ("export-analytics", 5),
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Latencia, throughput, memoria y queries de /jobs/, /jobs/<pk>/ y /export/*"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Requests por endpoint")
+        parser.add_argument("--only", nargs="+", help="Url names a medir (ej: job-list export-csv)")
+        parser.add_argument("--gunicorn", action="store_true", help="Medir contra gunicorn local")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--output", help="Archivo JSON de resultados")
+        parser.add_argument(
+            "--no-query-check", action="store_true",
+            help="No fallar si un endpoint supera su presupuesto de queries",
+        )
+
+    def handle(self, *args, **options):
+        # Sin subdominio se usa la cuadrilla por defecto (ver CrewMiddleware)
+        job = Job.objects.filter(crew_id=default_crew()).order_by("-date").first()
+        if job is None:
+            raise CommandError("No hay trabajos: correr antes `manage.py seed_jobs`")
+
+        endpoints = [
+            (name, reverse(name, args=[job.pk]) if name == "job-detail" else reverse(name), budget)
+            for name, budget in ENDPOINTS
+            if not options["only"] or name in options["only"]
+        ]
+
+        if options["gunicorn"]:
+            results = self.run_gunicorn(endpoints, options)
+        else:
+            results = self.run_client(endpoints, options)
+
+        report = {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "mode": "gunicorn" if options["gunicorn"] else "client",
+            "database": connection.vendor,
+            "jobs": Job.objects.count(),
+            "results": results,
+        }
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+
+        for r in results:
+            line = (
+                f"{r['endpoint']:<16} p50 {r['p50_ms']:8.1f} ms · p95 {r['p95_ms']:8.1f} ms"
+                f" · {r['throughput_rps']:7.1f} req/s"
+            )
+            if "queries" in r:
+                line += f" · {r['queries']} queries · pico {r['peak_memory_kb']} KB"
+            self.stdout.write(line)
+
+        over_budget = [r for r in results if r.get("queries", 0) > r["query_budget"]]
+        if over_budget and not options["no_query_check"]:
+            raise CommandError("Superan el presupuesto de queries: " + ", ".join(
+                f"{r['endpoint']} ({r['queries']} > {r['query_budget']})" for r in over_budget
+            ))
+
+    # ==========================
+    # Django test client (un proceso)
+    # ==========================
+
+    def run_client(self, endpoints, options):
+        client = Client(HTTP_HOST="localhost")
+        results = []
+
+        # Se mide la vista, no el rate limit del middleware ni el perfilado
+        profiling = {**settings.EXPORT_PROFILING, "TRACE_MEMORY": False, "SAMPLE_RATE": 0}
+        with override_settings(RATE_LIMIT_REQUESTS=sys.maxsize, EXPORT_PROFILING=profiling):
+            for name, url, budget in endpoints:
+                with CaptureQueriesContext(connection) as queries:
+                    self.get(client, url)
+                # Contar ya: los requests siguientes vacían connection.queries
+                query_count = len(queries)
+
+                timings = []
+                started = time.perf_counter()
+                for _ in range(options["iterations"]):
+                    start = time.perf_counter()
+                    self.get(client, url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                elapsed = time.perf_counter() - started
+
+                # Request aparte: tracemalloc hace más lento todo lo demás
+                tracemalloc.start()
+                self.get(client, url)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                results.append({
+                    "endpoint": name,
+                    "url": url,
+                    "requests": len(timings),
+                    "p50_ms": statistics.median(timings),
+                    "p95_ms": percentile(timings, 95),
+                    "max_ms": max(timings),
+                    "throughput_rps": len(timings) / elapsed,
+                    "queries": query_count,
+                    "query_budget": budget,
+                    "peak_memory_kb": peak // 1024,
+                })
+        return results
+
+    def get(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"{url} devolvió {response.status_code}")
+        # Las exportaciones pueden ser streaming
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    # ==========================
+    # gunicorn local (varios workers)
+    # ==========================
+
+    def run_gunicorn(self, endpoints, options):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "jardineria_app.settings.local"),
+            "RATE_LIMIT_REQUESTS": str(sys.maxsize),
+            # tracemalloc/cProfile de jobs/profiling.py distorsionan la latencia
+            "EXPORT_TRACE_MEMORY": "0",
+            "EXPORT_PROFILE_SAMPLE_RATE": "0",
+        }
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", "jardineria_app.wsgi",
+                "--workers", str(options["workers"]),
+                "--bind", f"127.0.0.1:{port}",
+                "--chdir", str(settings.BASE_DIR),
+            ],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+
+        try:
+            self.wait_until_up(base_url)
+            results = []
+            for name, url, budget in endpoints:
+                total = options["iterations"] * options["concurrency"]
+                started = time.perf_counter()
+                with ThreadPoolExecutor(options["concurrency"]) as pool:
+                    timings = list(pool.map(lambda _: self.fetch(base_url + url), range(total)))
+                elapsed = time.perf_counter() - started
+
+                results.append({
+                    "endpoint": name,
+                    "url": url,
+                    "requests": total,
+                    "workers": options["workers"],
+                    "concurrency": options["concurrency"],
+                    "p50_ms": statistics.median(timings),
+                    "p95_ms": percentile(timings, 95),
+                    "max_ms": max(timings),
+                    "throughput_rps": total / elapsed,
+                    "query_budget": budget,
+                    "workers_peak_rss_kb": worker_peak_rss(server.pid),
+                })
+            return results
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    def wait_until_up(self, base_url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(base_url + "/health/", timeout=1).read()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("gunicorn no respondió a /health/")
+
+    def fetch(self, url):
+        start = time.perf_counter()
+        with urllib.request.urlopen(url, timeout=120) as res:
+            res.read()
+        return (time.perf_counter() - start) * 1000
+
+
+def worker_peak_rss(master_pid):
+    """Pico de RSS (VmHWM) de cada worker de gunicorn. Sólo Linux."""
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as fh:
+            pids = fh.read().split()
+        peaks = []
+        for pid in pids:
+            with open(f"/proc/{pid}/status") as fh:
+                for line in fh:
+                    if line.startswith("VmHWM:"):
+                        peaks.append(int(line.split()[1]))
+        return peaks
+    except OSError:
+        return None
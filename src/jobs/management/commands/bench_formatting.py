@@ -0,0 +1,103 @@
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.formatting import date_column, hhmm_column, month_labels, short_duration
+
+# Cómo se formateaba antes fila por fila (views.py / duration_filters.py)
+MESES_ES = {
+    "January": "Enero", "February": "Febrero", "March": "Marzo", "April": "Abril",
+    "May": "Mayo", "June": "Junio", "July": "Julio", "August": "Agosto",
+    "September": "Septiembre", "October": "Octubre", "November": "Noviembre",
+    "December": "Diciembre",
+}
+
+
+def legacy_hhmm(mins):
+    horas = mins // 60
+    minutos = mins % 60
+    return f"{horas}h {minutos:02d}m"
+
+
+def legacy_short(value):
+    hours = value // 60
+    minutes = value % 60
+    if hours > 0 and minutes > 0:
+        return f"{hours}h {minutes}m"
+    elif hours > 0:
+        return f"{hours}h"
+    return f"{minutes}m"
+
+
+def legacy_month(day):
+    mes_en = day.strftime("%B")
+    return f"{MESES_ES.get(mes_en, mes_en)} {day.strftime('%Y')}"
+
+
+class Command(BaseCommand):
+    help = "Compara el formateo fila por fila con las tablas de jobs/formatting.py"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        rng = random.Random(0)
+        minutes = [rng.randint(15, 600) for _ in range(rows)]
+        # Varios trabajos por día, a lo largo de tres años
+        start = date(2023, 1, 1)
+        days = sorted(start + timedelta(days=rng.randint(0, 3 * 365)) for _ in range(rows))
+
+        cases = {
+            "duración hh:mm": (
+                lambda: [legacy_hhmm(m) for m in minutes],
+                lambda: hhmm_column(minutes),
+            ),
+            "duración template": (
+                lambda: [legacy_short(m) for m in minutes],
+                lambda: [short_duration(m) for m in minutes],
+            ),
+            "fecha dd/mm/aaaa": (
+                lambda: [d.strftime("%d/%m/%Y") for d in days],
+                lambda: date_column(days, "%d/%m/%Y"),
+            ),
+            "mes en español": (
+                lambda: [legacy_month(d) for d in days],
+                lambda: month_labels(days),
+            ),
+        }
+
+        results = []
+        for name, (legacy, shared) in cases.items():
+            if legacy() != shared():
+                raise CommandError(f"{name}: el resultado no coincide con el formateo anterior")
+            before, after = self.measure(legacy), self.measure(shared)
+            results.append({
+                "case": name,
+                "rows": rows,
+                "legacy_ns_per_row": round(before / rows * 1e9, 1),
+                "shared_ns_per_row": round(after / rows * 1e9, 1),
+                "speedup": round(before / after, 2),
+            })
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, ensure_ascii=False))
+            return
+
+        for r in results:
+            self.stdout.write(
+                f"{r['case']:<20} antes {r['legacy_ns_per_row']:7.1f} ns/fila"
+                f" · ahora {r['shared_ns_per_row']:7.1f} ns/fila · x{r['speedup']}"
+            )
+
+    def measure(self, func, repeat=3):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from jobs.frontend import local_asset_size, page_assets
+
+
+class Command(BaseCommand):
+    help = "Cuenta requests y bytes iniciales de una página (ej: /jobs/1/)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+")
+        parser.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST="localhost")
+        results = []
+
+        for path in options["paths"]:
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f"{path} devolvió {response.status_code}")
+
+            html = response.content.decode()
+            assets = page_assets(html)
+            for asset in assets:
+                asset["bytes"] = local_asset_size(asset["url"])
+
+            local = [a for a in assets if a["bytes"] is not None]
+            results.append({
+                "path": path,
+                "html_bytes": len(response.content),
+                "requests": len(assets),
+                "local_requests": len(local),
+                "local_bytes": sum(a["bytes"] for a in local),
+                "external_requests": len(assets) - len(local),
+                "blocking_requests": sum(a["blocking"] for a in assets),
+                "assets": assets,
+            })
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results:
+            self.stdout.write(self.style.MIGRATE_HEADING(result["path"]))
+            for asset in result["assets"]:
+                size = "externo" if asset["bytes"] is None else f"{asset['bytes']} B"
+                flag = " [bloquea]" if asset["blocking"] else ""
+                self.stdout.write(f"  {asset['tag']:<6} {size:>10}  {asset['url']}{flag}")
+            self.stdout.write(
+                f"  HTML {result['html_bytes']} B · {result['requests']} requests "
+                f"({result['local_requests']} locales, {result['local_bytes']} B; "
+                f"{result['external_requests']} externos; "
+                f"{result['blocking_requests']} bloqueantes)"
+            )
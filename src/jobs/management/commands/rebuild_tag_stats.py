@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from jobs.cache import bump_data_version
+from jobs.db import with_session_timeout
+from jobs.tags import rebuild_tag_stats
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero los conteos y co-ocurrencias de etiquetas (TagStat / TagPair)"
+
+    # Tablas enteras: sin el statement_timeout de la web
+    @with_session_timeout("command")
+    def handle(self, *args, **options):
+        stats, pairs = rebuild_tag_stats()
+        # El listado cachea los conteos por cuadrilla
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"{stats} conteos y {pairs} pares de etiquetas"))
@@ -0,0 +1,141 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.functions import TruncMonth
+
+from jobs.cache import bump_month_versions
+from jobs.db import with_session_timeout
+from jobs.models import (
+    ArchivedJob, Crew, Job, JobPhoto, Location, MonthlySummary, Tag, TagPair, TagStat, default_crew,
+)
+from jobs.signals import bulk_changes
+from jobs.tags import rebuild_tag_stats
+
+TAG_NAMES = [
+    "poda", "riego", "corte-cesped", "desmalezado", "fertilizacion",
+    "plantacion", "limpieza", "cerco", "abono", "fumigacion",
+]
+
+WORDS = (
+    "corte césped borde cantero poda arbusto riego maceta limpieza hojas "
+    "desmalezado vereda fertilizante plantines cerco retiro ramas"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Genera trabajos, fotos y etiquetas sintéticos para benchmarks (1k, 100k, 1M...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Cantidad de trabajos")
+        parser.add_argument("--photos-per-job", type=int, default=2)
+        parser.add_argument("--tags-per-job", type=int, default=2)
+        parser.add_argument("--years", type=int, default=3, help="Rango de fechas hacia atrás")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--crew", help="Slug de la cuadrilla (por defecto DEFAULT_CREW_SLUG)")
+        parser.add_argument("--clear", action="store_true", help="Borra los datos existentes antes")
+
+    # Tablas enteras: sin el statement_timeout de la web
+    @with_session_timeout("command")
+    def handle(self, *args, **options):
+        # Sin señales fila por fila: se invalida una vez al salir
+        with bulk_changes():
+            self.seed(options)
+
+    def seed(self, options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+
+        if options["clear"]:
+            self.clear()
+
+        if options["crew"]:
+            options["crew_id"] = Crew.objects.get_or_create(
+                slug=options["crew"], defaults={"name": options["crew"]},
+            )[0].pk
+        else:
+            options["crew_id"] = default_crew()
+
+        tags = [Tag.objects.get_or_create(name=name)[0] for name in TAG_NAMES]
+        locations = [value for value, _ in Location.choices]
+        today = datetime.date.today()
+        days = options["years"] * 365
+
+        created = 0
+        while created < options["rows"]:
+            size = min(batch_size, options["rows"] - created)
+            with transaction.atomic():
+                self.create_batch(rng, size, tags, locations, today, days, options)
+            created += size
+            self.stdout.write(f"  {created}/{options['rows']}")
+
+        # Conteos por etiqueta: un recálculo al final, no un delta por lote
+        rebuild_tag_stats()
+
+        self.stdout.write(self.style.SUCCESS(f"{created} trabajos generados"))
+
+    def clear(self):
+        """
+        Borra trabajos, fotos, archivo y resúmenes con un DELETE por tabla.
+        QuerySet.delete() cargaría cada fila para mandar sus señales.
+        """
+        # Los fragmentos del PDF de los meses que desaparecen
+        months = set(
+            Job.objects.annotate(month=TruncMonth("date"))
+            .values_list("crew_id", "month").distinct().order_by()
+        )
+        months.update(MonthlySummary.objects.values_list("crew_id", "month"))
+
+        tables = [
+            JobPhoto, Job.tags.through, ArchivedJob.tags.through, ArchivedJob,
+            MonthlySummary, TagPair, TagStat, Job,
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in tables:
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+
+        bump_month_versions(months)
+
+    def create_batch(self, rng, size, tags, locations, today, days, options):
+        photos_per_job = options["photos_per_job"]
+        job_tags = []
+        jobs = []
+
+        for _ in range(size):
+            chosen = sorted(rng.sample(tags, min(options["tags_per_job"], len(tags))), key=lambda t: t.name)
+            job_tags.append(chosen)
+            jobs.append(Job(
+                crew_id=options["crew_id"],
+                date=today - datetime.timedelta(days=rng.randrange(days)),
+                location=rng.choice(locations),
+                duration=rng.randrange(15, 8 * 60, 5),
+                description=" ".join(rng.choices(WORDS, k=rng.randrange(5, 25))),
+                # bulk_create no dispara señales: el resumen se arma acá
+                photo_count=photos_per_job,
+                has_before=photos_per_job > 0,
+                has_after=photos_per_job > 1,
+                tag_names=",".join(tag.name for tag in chosen),
+            ))
+
+        # PostgreSQL y SQLite devuelven los ids en bulk_create
+        jobs = Job.objects.bulk_create(jobs, batch_size=options["batch_size"])
+        # Tampoco invalida los fragmentos del PDF de esos meses
+        bump_month_versions((job.crew_id, job.date) for job in jobs)
+
+        Job.tags.through.objects.bulk_create([
+            Job.tags.through(job_id=job.pk, tag_id=tag.pk)
+            for job, chosen in zip(jobs, job_tags)
+            for tag in chosen
+        ], batch_size=options["batch_size"])
+
+        JobPhoto.objects.bulk_create([
+            JobPhoto(
+                job_id=job.pk,
+                photo=f"job_photos/seed_{job.pk}_{n}",
+                before_after="before" if n % 2 == 0 else "after",
+            )
+            for job in jobs
+            for n in range(photos_per_job)
+        ], batch_size=options["batch_size"])
@@ -0,0 +1,44 @@
+import re
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.frontend import VENDOR_ASSETS, cdn_url, vendor_path
+
+# ManifestStaticFilesStorage intenta resolver los source maps: si el .map
+# no existe collectstatic falla, así que se quitan las referencias.
+SOURCE_MAP_RE = re.compile(rb"\n?/[/*][#@] sourceMappingURL=[^\n]*")
+
+
+class Command(BaseCommand):
+    help = "Descarga Swiper y PhotoSwipe (versiones fijas) a static/vendor/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Vuelve a descargar aunque el archivo ya exista",
+        )
+
+    def handle(self, *args, **options):
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+
+        for name in VENDOR_ASSETS:
+            target = static_dir / vendor_path(name)
+            if target.exists() and not options["force"]:
+                self.stdout.write(f"= {target.relative_to(static_dir)}")
+                continue
+
+            url = cdn_url(name)
+            try:
+                with urllib.request.urlopen(url, timeout=30) as res:
+                    content = res.read()
+            except OSError as exc:
+                raise CommandError(f"No se pudo descargar {url}: {exc}")
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(SOURCE_MAP_RE.sub(b"", content))
+            self.stdout.write(self.style.SUCCESS(
+                f"+ {target.relative_to(static_dir)} ({len(content)} bytes)"
+            ))
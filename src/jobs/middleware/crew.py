@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.validators import slug_re
+
+from jobs.models import Crew, default_crew
+
+SLUG_MAX_LENGTH = Crew._meta.get_field("slug").max_length
+
+
+def crew_cache_key(slug):
+    return f"crew:{slug}"
+
+
+def lookup_crew(slug):
+    """
+    Cuadrilla por slug, cacheada (None si no existe). La invalidan las señales.
+    Sólo se cachean las que existen: el subdominio viene del Host, y un
+    Host inventado no puede llenar la cache.
+    """
+    if len(slug) > SLUG_MAX_LENGTH or not slug_re.match(slug):
+        return None
+    key = crew_cache_key(slug)
+    crew = cache.get(key)
+    if crew is None:
+        crew = Crew.objects.filter(slug=slug).first()
+        if crew is not None:
+            cache.set(key, crew, settings.CREW_CACHE_SECONDS)
+    return crew
+
+
+def crew_subdomain(host):
+    """
+    "norte" de norte.<CREW_DOMAIN> (norte.localhost en desarrollo). Otros
+    hosts no eligen cuadrilla: en <app>.onrender.com el nombre de la app no
+    es una cuadrilla.
+    """
+    domain = settings.CREW_DOMAIN
+    if not domain:
+        return None
+    subdomain, _, rest = host.split(":")[0].lower().partition(".")
+    return subdomain if subdomain and rest == domain else None
+
+
+def resolve_crew(request):
+    """Subdominio del host (cuadrilla.CREW_DOMAIN) o la cuadrilla por defecto."""
+    subdomain = crew_subdomain(request.get_host())
+    crew = lookup_crew(subdomain) if subdomain else None
+    if crew is None:
+        crew = lookup_crew(settings.DEFAULT_CREW_SLUG)
+    if crew is None:
+        # Instalación nueva: se crea la cuadrilla por defecto
+        default_crew()
+        crew = lookup_crew(settings.DEFAULT_CREW_SLUG)
+    return crew
+
+
+class CrewMiddleware:
+    """
+    Resuelve la cuadrilla una vez por request (request.crew). Vistas,
+    totales, caches y exportaciones se filtran por ella.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.crew = resolve_crew(request)
+        return self.get_response(request)
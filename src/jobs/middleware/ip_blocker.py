@@ -19,8 +19,13 @@ class MaliciousIPBlockerMiddleware:
 
         if response.status_code == 404:
             key = f"404:{ip}"
-            count = cache.get(key, 0) + 1
-            cache.set(key, count, timeout=3600)
+            # add + incr: atómico entre workers (cache compartida)
+            cache.add(key, 0, timeout=3600)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout=3600)
+                count = 1
 
             # Si supera el límite → bloqueo IP
             if count >= self.MAX_404:
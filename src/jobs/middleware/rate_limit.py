@@ -1,27 +1,30 @@
+from django.conf import settings
 from django.core.cache import cache
 from django.http import HttpResponse
 import time
 
 class SimpleRateLimitMiddleware:
-    RATE = 100   # requests
-    WINDOW = 60  # segundos
+    WINDOW = 60  # segundos (requests por ventana: settings.RATE_LIMIT_REQUESTS)
 
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         ip = request.META.get("REMOTE_ADDR", "unknown")
-        key = f"rl:{ip}"
-        data = cache.get(key, {"count": 0, "start": time.time()})
 
-        # Reiniciar ventana
-        if time.time() - data["start"] > self.WINDOW:
-            data = {"count": 0, "start": time.time()}
+        # Una clave por ventana; add + incr es atómico en la cache compartida,
+        # así el límite vale para todos los workers juntos
+        window = int(time.time() // self.WINDOW)
+        key = f"rl:{ip}:{window}"
+        cache.add(key, 0, timeout=self.WINDOW)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Se desalojó entre el add y el incr
+            cache.set(key, 1, timeout=self.WINDOW)
+            count = 1
 
-        data["count"] += 1
-        cache.set(key, data, timeout=self.WINDOW)
-
-        if data["count"] > self.RATE:
+        if count > settings.RATE_LIMIT_REQUESTS:
             return HttpResponse("Too many requests", status=429)
 
         return self.get_response(request)
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+
+from jobs.routers import replica_allowed
+
+STICKY_COOKIE = "primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Habilita la réplica sólo para requests de lectura. Después de una
+    escritura el navegador queda "pegado" al primario REPLICA_STICKY_SECONDS
+    (cookie), para que vea lo que acaba de guardar aunque la réplica
+    tenga lag. El admin siempre usa el primario.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method not in SAFE_METHODS
+        allowed = (
+            settings.DATABASE_READ_REPLICA is not None
+            and not writes
+            and not request.path.startswith("/admin/")
+            and not self.is_sticky(request)
+        )
+
+        token = replica_allowed.set(allowed)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_allowed.reset(token)
+
+        if writes and settings.DATABASE_READ_REPLICA is not None:
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(int(time.time()) + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+                secure=request.is_secure(),
+            )
+        return response
+
+    def is_sticky(self, request):
+        try:
+            return int(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.9 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('date', models.DateField(db_index=True)),
+                ('location', models.CharField(choices=[('delegacion', 'Delegación'), ('farmacia', 'Farmacia'), ('optica', 'Óptica'), ('otro', 'Otro'), ('exterior', 'Exterior'), ('interior', 'Interior')], max_length=30)),
+                ('duration', models.PositiveIntegerField(help_text='Duración en minutos')),
+                ('description', models.TextField(blank=True)),
+                ('tag_names', models.TextField(blank=True)),
+                ('photo_count', models.PositiveIntegerField(default=0)),
+                ('has_before', models.BooleanField(default=False)),
+                ('has_after', models.BooleanField(default=False)),
+                ('photos', models.JSONField(blank=True, default=list, help_text='[{"photo": public_id, "before_after": ...}]')),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Trabajo archivado',
+                'verbose_name_plural': 'Trabajos archivados',
+                'ordering': ['-date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('total_minutes', models.PositiveIntegerField(default=0)),
+                ('job_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumen mensual',
+                'verbose_name_plural': 'Resúmenes mensuales',
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['date'], name='job_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedjob',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='archived_jobs', to='jobs.tag'),
+        ),
+    ]
@@ -0,0 +1,102 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import jobs.models
+
+
+def assign_default_crew(apps, schema_editor):
+    """Todo lo cargado hasta ahora es de la cuadrilla por defecto."""
+    db_alias = schema_editor.connection.alias
+    Crew = apps.get_model('jobs', 'Crew')
+    crew, _ = Crew.objects.using(db_alias).get_or_create(
+        slug=settings.DEFAULT_CREW_SLUG,
+        defaults={'name': 'Principal', 'report_author': 'Lucas Soria'},
+    )
+    for model in ('Job', 'ArchivedJob', 'MonthlySummary'):
+        apps.get_model('jobs', model).objects.using(db_alias).filter(crew__isnull=True).update(crew=crew)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_job_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Crew',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(help_text='Subdominio de la cuadrilla (slug.dominio)', unique=True)),
+                ('report_author', models.CharField(blank=True, help_text='Firma de los informes XLSX/PDF', max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Cuadrilla',
+                'verbose_name_plural': 'Cuadrillas',
+                'ordering': ['name'],
+            },
+        ),
+
+        # Primero nullable, se completa y recién después NOT NULL
+        migrations.AddField(
+            model_name='job',
+            name='crew',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='jobs', to='jobs.crew'),
+        ),
+        migrations.AddField(
+            model_name='archivedjob',
+            name='crew',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_jobs', to='jobs.crew'),
+        ),
+        migrations.AddField(
+            model_name='monthlysummary',
+            name='crew',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='monthly_summaries', to='jobs.crew'),
+        ),
+        migrations.RunPython(assign_default_crew, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='job',
+            name='crew',
+            field=models.ForeignKey(default=jobs.models.default_crew, on_delete=django.db.models.deletion.PROTECT, related_name='jobs', to='jobs.crew'),
+        ),
+        migrations.AlterField(
+            model_name='archivedjob',
+            name='crew',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_jobs', to='jobs.crew'),
+        ),
+        migrations.AlterField(
+            model_name='monthlysummary',
+            name='crew',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='monthly_summaries', to='jobs.crew'),
+        ),
+
+        # Índices por cuadrilla en lugar de los globales por fecha / mes
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['crew', 'date'], name='job_crew_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='archivedjob',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AddIndex(
+            model_name='archivedjob',
+            index=models.Index(fields=['crew', 'date'], name='archivedjob_crew_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='monthlysummary',
+            name='month',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlysummary',
+            constraint=models.UniqueConstraint(fields=('crew', 'month'), name='monthlysummary_crew_month_uniq'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def populate_tag_stats(apps, schema_editor):
+    """Conteos y pares de lo ya cargado (lo mismo que `rebuild_tag_stats`)."""
+    db_alias = schema_editor.connection.alias
+    JobTag = apps.get_model('jobs', 'Job')._meta.get_field('tags').remote_field.through
+    TagStat = apps.get_model('jobs', 'TagStat')
+    TagPair = apps.get_model('jobs', 'TagPair')
+
+    rows = JobTag.objects.using(db_alias)
+    TagStat.objects.using(db_alias).bulk_create([
+        TagStat(crew_id=row['crew_id'], tag_id=row['tag_id'], job_count=row['jobs'], total_minutes=row['minutes'] or 0)
+        for row in rows.values('tag_id', crew_id=F('job__crew_id'))
+        .annotate(jobs=Count('job_id'), minutes=Sum('job__duration')).order_by()
+    ], batch_size=1000)
+    TagPair.objects.using(db_alias).bulk_create([
+        TagPair(crew_id=row['crew_id'], tag_id=row['tag_id'], other_id=row['other_id'], job_count=row['jobs'])
+        for row in rows.annotate(crew_id=F('job__crew_id'), other_id=F('job__tags__id'))
+        .exclude(other_id=F('tag_id'))
+        .values('crew_id', 'tag_id', 'other_id')
+        .annotate(jobs=Count('job_id')).order_by()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_crew'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_count', models.PositiveIntegerField(default=0)),
+                ('crew', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_pairs', to='jobs.crew')),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobs.tag')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairs', to='jobs.tag')),
+            ],
+            options={
+                'verbose_name': 'Par de etiquetas',
+                'verbose_name_plural': 'Pares de etiquetas',
+                'constraints': [models.UniqueConstraint(fields=('crew', 'tag', 'other'), name='tagpair_crew_tag_other_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_count', models.PositiveIntegerField(default=0)),
+                ('total_minutes', models.PositiveIntegerField(default=0)),
+                ('crew', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_stats', to='jobs.crew')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='jobs.tag')),
+            ],
+            options={
+                'verbose_name': 'Conteo de etiqueta',
+                'verbose_name_plural': 'Conteos de etiquetas',
+                'constraints': [models.UniqueConstraint(fields=('crew', 'tag'), name='tagstat_crew_tag_uniq')],
+            },
+        ),
+
+        # Índice cubriente para filtrar por etiqueta: el filtro del listado
+        # resuelve (tag_id → job_id) sólo con el índice, sin ir a las filas
+        migrations.RunSQL(
+            'CREATE INDEX jobs_job_tags_tag_job_idx ON jobs_job_tags (tag_id, job_id)',
+            'DROP INDEX jobs_job_tags_tag_job_idx',
+        ),
+        migrations.RunPython(populate_tag_stats, migrations.RunPython.noop),
+    ]
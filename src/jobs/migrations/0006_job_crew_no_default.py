@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_tag_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='crew',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='jobs', to='jobs.crew'),
+        ),
+    ]
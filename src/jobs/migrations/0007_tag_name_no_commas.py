@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 13:18
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_job_crew_no_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='name',
+            field=models.CharField(max_length=50, unique=True, validators=[django.core.validators.RegexValidator(',', inverse_match=True, message='El nombre no puede tener comas.')]),
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import Count, Q
 from cloudinary.models import CloudinaryField
 
 
@@ -11,7 +14,90 @@ class Location(models.TextChoices):
     INTERIOR = 'interior', 'Interior'
 
 
+# ==============================
+# Cuadrillas (varios equipos / clientes en una sola instalación)
+# ==============================
+
+class Crew(models.Model):
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True, help_text='Subdominio de la cuadrilla (slug.dominio)')
+    report_author = models.CharField(max_length=100, blank=True, help_text='Firma de los informes XLSX/PDF')
+
+    class Meta:
+        verbose_name = 'Cuadrilla'
+        verbose_name_plural = 'Cuadrillas'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+def default_crew():
+    """Id de la cuadrilla por defecto (DEFAULT_CREW_SLUG); la crea si falta."""
+    crew, _ = Crew.objects.get_or_create(
+        slug=settings.DEFAULT_CREW_SLUG,
+        defaults={'name': 'Principal', 'report_author': 'Lucas Soria'},
+    )
+    return crew.pk
+
+
+# Columnas comunes a Job y ArchivedJob (en el mismo orden, para el UNION)
+HISTORY_FIELDS = (
+    'date', 'location', 'duration', 'description',
+    'tag_names', 'photo_count', 'has_before', 'has_after',
+)
+
+
+class JobManager(models.Manager):
+    def history(self, start=None, end=None, crew=None, ranges=None):
+        """
+        Trabajos entre `start` y `end` (inclusive), calientes y archivados,
+        de una cuadrilla (o de todas si `crew` es None). `ranges` =
+        [(desde, hasta)] en lugar de un solo rango, en la misma query.
+        Sólo se une con ArchivedJob si el rango llega a meses archivados.
+        Filas con nombre: `job_id` es None para los archivados y
+        `archived_id` para los calientes.
+        """
+        from .archive import archive_boundary
+
+        if ranges is None:
+            ranges = [(start, end)]
+        dates = models.Q()
+        for lo, hi in ranges:
+            bounds = models.Q()
+            if lo:
+                bounds &= models.Q(date__gte=lo)
+            if hi:
+                bounds &= models.Q(date__lte=hi)
+            dates |= bounds
+        first = None if any(lo is None for lo, _ in ranges) else min(lo for lo, _ in ranges)
+
+        hot = self.get_queryset().annotate(
+            job_id=models.F('id'),
+            archived_id=models.Value(None, output_field=models.BigIntegerField()),
+        ).filter(dates)
+        if crew is not None:
+            hot = hot.filter(crew=crew)
+        hot = hot.values_list('job_id', 'archived_id', *HISTORY_FIELDS, named=True).order_by()
+
+        boundary = archive_boundary()
+        if boundary is None or (first and first >= boundary):
+            return hot.order_by('-date')
+
+        cold = ArchivedJob.objects.annotate(
+            job_id=models.Value(None, output_field=models.BigIntegerField()),
+            archived_id=models.F('id'),
+        ).filter(dates)
+        if crew is not None:
+            cold = cold.filter(crew=crew)
+        cold = cold.values_list('job_id', 'archived_id', *HISTORY_FIELDS, named=True).order_by()
+
+        return hot.union(cold, all=True).order_by('-date')
+
+
 class Job(models.Model):
+    # Sin default: quien crea el trabajo elige la cuadrilla (request.crew, admin, seed_jobs)
+    crew = models.ForeignKey(Crew, on_delete=models.PROTECT, related_name='jobs')
     date = models.DateField()
     location = models.CharField(max_length=30, choices=Location.choices)
     duration = models.PositiveIntegerField(help_text='Duración en minutos')
@@ -19,13 +105,47 @@ class Job(models.Model):
     tags = models.ManyToManyField('Tag', blank=True, related_name='jobs')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Resumen desnormalizado para el listado (lo mantienen las señales
+    # de jobs/signals.py; `backfill_job_summaries` lo recalcula)
+    photo_count = models.PositiveIntegerField(default=0, editable=False)
+    has_before = models.BooleanField(default=False, editable=False)
+    has_after = models.BooleanField(default=False, editable=False)
+    tag_names = models.TextField(blank=True, editable=False, help_text='Etiquetas separadas por coma')
+
+    objects = JobManager()
+
     class Meta:
         verbose_name = 'Trabajo'
         verbose_name_plural = 'Trabajos'
         ordering = ['-date', '-created_at']
+        # Toda consulta de la web filtra por cuadrilla y ordena / corta por fecha
+        indexes = [models.Index(fields=['crew', 'date'], name='job_crew_date_idx')]
 
     def __str__(self):
         return f"{self.date} - {self.location}"
+
+    @property
+    def tag_list(self):
+        return self.tag_names.split(",") if self.tag_names else []
+
+    def refresh_photo_summary(self):
+        stats = self.photos.aggregate(
+            count=Count('id'),
+            before=Count('id', filter=Q(before_after='before')),
+            after=Count('id', filter=Q(before_after='after')),
+        )
+        self.photo_count = stats['count']
+        self.has_before = stats['before'] > 0
+        self.has_after = stats['after'] > 0
+        Job.objects.filter(pk=self.pk).update(
+            photo_count=self.photo_count,
+            has_before=self.has_before,
+            has_after=self.has_after,
+        )
+
+    def refresh_tag_summary(self):
+        self.tag_names = ",".join(self.tags.values_list('name', flat=True))
+        Job.objects.filter(pk=self.pk).update(tag_names=self.tag_names)
     
 
 class JobPhoto(models.Model):
@@ -43,7 +163,11 @@ class JobPhoto(models.Model):
     
 
 class Tag(models.Model):
-    name = models.CharField(max_length=50, unique=True)
+    # Sin comas: Job.tag_names las usa de separador
+    name = models.CharField(
+        max_length=50, unique=True,
+        validators=[RegexValidator(r',', inverse_match=True, message='El nombre no puede tener comas.')],
+    )
 
     class Meta:
         verbose_name = 'Etiqueta'
@@ -51,4 +175,96 @@ class Tag(models.Model):
         ordering = ['name']
 
     def __str__(self):
-        return f"#{self.name}"
\ No newline at end of file
+        return f"#{self.name}"
+
+
+# ==============================
+# Archivo (trabajos viejos, ver `archive_jobs`)
+# ==============================
+
+class ArchivedJob(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    crew = models.ForeignKey(Crew, on_delete=models.PROTECT, related_name='archived_jobs')
+    date = models.DateField()
+    location = models.CharField(max_length=30, choices=Location.choices)
+    duration = models.PositiveIntegerField(help_text='Duración en minutos')
+    description = models.TextField(blank=True)
+    tags = models.ManyToManyField('Tag', blank=True, related_name='archived_jobs')
+    tag_names = models.TextField(blank=True)
+    photo_count = models.PositiveIntegerField(default=0)
+    has_before = models.BooleanField(default=False)
+    has_after = models.BooleanField(default=False)
+    photos = models.JSONField(default=list, blank=True, help_text='[{"photo": public_id, "before_after": ...}]')
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Trabajo archivado'
+        verbose_name_plural = 'Trabajos archivados'
+        ordering = ['-date', '-created_at']
+        indexes = [models.Index(fields=['crew', 'date'], name='archivedjob_crew_date_idx')]
+
+    def __str__(self):
+        return f"{self.date} - {self.location} (archivado)"
+
+
+class MonthlySummary(models.Model):
+    """Totales congelados de los meses archivados, por cuadrilla."""
+    crew = models.ForeignKey(Crew, on_delete=models.PROTECT, related_name='monthly_summaries')
+    month = models.DateField()
+    total_minutes = models.PositiveIntegerField(default=0)
+    job_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Resumen mensual'
+        verbose_name_plural = 'Resúmenes mensuales'
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(fields=['crew', 'month'], name='monthlysummary_crew_month_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.total_minutes} min"
+
+
+# ==============================
+# Etiquetas: conteos y co-ocurrencias (los mantiene jobs/tags.py)
+# ==============================
+
+class TagStat(models.Model):
+    """Trabajos y minutos por etiqueta, por cuadrilla (sólo trabajos sin archivar)."""
+    crew = models.ForeignKey(Crew, on_delete=models.CASCADE, related_name='tag_stats')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='stats')
+    job_count = models.PositiveIntegerField(default=0)
+    total_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Conteo de etiqueta'
+        verbose_name_plural = 'Conteos de etiquetas'
+        constraints = [
+            models.UniqueConstraint(fields=['crew', 'tag'], name='tagstat_crew_tag_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.tag}: {self.job_count} trabajos"
+
+
+class TagPair(models.Model):
+    """
+    Trabajos que llevan `tag` y `other` a la vez. Se guarda en los dos
+    sentidos, así las sugerencias de una etiqueta salen del índice único.
+    """
+    crew = models.ForeignKey(Crew, on_delete=models.CASCADE, related_name='tag_pairs')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='pairs')
+    other = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='+')
+    job_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Par de etiquetas'
+        verbose_name_plural = 'Pares de etiquetas'
+        constraints = [
+            models.UniqueConstraint(fields=['crew', 'tag', 'other'], name='tagpair_crew_tag_other_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.tag} + {self.other}: {self.job_count}"
@@ -0,0 +1,156 @@
+import cProfile
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger("jobs.exports")
+
+# Quién tiene tracemalloc arrancado (ver `export_profile`)
+_trace_lock = threading.Lock()
+
+
+# ==============================
+# Perfil de una exportación
+# ==============================
+
+class ExportProfile:
+    """Lo que se loguea de cada exportación (ver `export_profile`)."""
+
+    def __init__(self, fmt):
+        self.format = fmt
+        self.rows = 0
+        self.bytes = 0
+        self.fetch = 0.0
+
+    @contextmanager
+    def fetching(self):
+        """Acumula el tiempo de las queries; el resto cuenta como render."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fetch += time.perf_counter() - started
+
+
+@contextmanager
+def export_profile(fmt):
+    """
+    with export_profile("pdf") as profile:
+        with profile.fetching():
+            jobs = list(...)
+        profile.rows = len(jobs)
+        ...
+        profile.bytes = len(content)
+
+    Loguea en "jobs.exports" filas, bytes y tiempos. Una muestra de las
+    exportaciones se corre con cProfile (y con tracemalloc si TRACE_MEMORY,
+    para el pico de memoria); el volcado se guarda si resultó lenta (ver
+    EXPORT_PROFILING).
+    """
+    config = settings.EXPORT_PROFILING
+    profile = ExportProfile(fmt)
+    if not config["ENABLED"]:
+        yield profile
+        return
+
+    # Memoria y cProfile sólo sobre la muestra: los dos distorsionan los tiempos
+    sampled = random.random() < config["SAMPLE_RATE"]
+
+    # tracemalloc es global al proceso: una sola exportación a la vez lo
+    # arranca (hilos del worker), y si ya estaba activo desde afuera
+    # (bench_endpoints) no se toca y el pico es el de quien lo arrancó
+    external = tracemalloc.is_tracing() and not _trace_lock.locked()
+    trace = (
+        config["TRACE_MEMORY"] and sampled and not tracemalloc.is_tracing()
+        and _trace_lock.acquire(blocking=False)
+    )
+    if trace:
+        tracemalloc.start()
+
+    profiler = None
+    if sampled:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Ya hay otro profiler activo en este proceso
+            profiler = None
+
+    started = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        elapsed = time.perf_counter() - started
+        if profiler:
+            profiler.disable()
+
+        peak = None
+        if trace or external:
+            peak = tracemalloc.get_traced_memory()[1]
+        if trace:
+            tracemalloc.stop()
+            _trace_lock.release()
+
+        dump = None
+        if profiler and elapsed * 1000 >= config["SLOW_MS"]:
+            dump = save_profile(profiler, fmt, config)
+
+        data = {
+            "format": fmt,
+            "rows": profile.rows,
+            "bytes": profile.bytes,
+            "fetch_ms": round(profile.fetch * 1000, 1),
+            "render_ms": round((elapsed - profile.fetch) * 1000, 1),
+            "total_ms": round(elapsed * 1000, 1),
+            "peak_kb": peak // 1024 if peak is not None else None,
+            "profile": str(dump) if dump else None,
+        }
+        logger.info(
+            " ".join(f"{key}=%s" for key in data),
+            *data.values(),
+            extra={"export": data},
+        )
+
+
+def profiled_export(fmt):
+    """
+    Decorador para las vistas de exportación: @profiled_export("xlsx").
+    La vista encuentra el perfil en request.export_profile (filas y fetch);
+    los bytes salen de la respuesta.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with export_profile(fmt) as profile:
+                request.export_profile = profile
+                response = view(request, *args, **kwargs)
+                profile.bytes = len(response.content)
+            return response
+        return wrapper
+    return decorator
+
+
+# ==============================
+# Volcados de cProfile (directorio rotativo)
+# ==============================
+
+def save_profile(profiler, fmt, config):
+    """Guarda el .prof y borra los más viejos si hay más de KEEP."""
+    directory = Path(config["DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+
+    path = directory / f"{datetime.now():%Y%m%d_%H%M%S_%f}_{fmt}.prof"
+    profiler.dump_stats(path)
+
+    dumps = sorted(directory.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in dumps[config["KEEP"]:]:
+        old.unlink(missing_ok=True)
+    return path
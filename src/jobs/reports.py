@@ -0,0 +1,385 @@
+import json
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Image as RLImage
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .archive import add_months
+from .cache import month_versions
+from .formatting import date_column, hhmm, hhmm_column, month_label
+from .image_cache import LRUDirectory, get_image_cache
+from .models import ArchivedJob, Job, JobPhoto
+from .routers import primary_reads
+
+# Subir cuando cambia el diseño: invalida todos los fragmentos guardados
+LAYOUT_VERSION = 2
+
+# Tamaño de las fotos en los reportes (px)
+REPORT_PHOTO_SIZE = (240, 180)
+
+PRIMARY_COLOR = colors.HexColor("#045C7C")
+
+
+# ==============================
+# Fotos antes / después (XLSX y PDF)
+# ==============================
+
+def report_photos(jobs):
+    """
+    {fila: {"before": ruta, "after": ruta}} para las filas de history()
+    exportadas, con miniaturas cacheadas en disco. Una query por tabla y
+    sólo por las fotos de esos trabajos; las que faltan se bajan en paralelo.
+    Los archivados usan los public_id que guardó el archivo (ArchivedJob.photos).
+    """
+    with_photos = [job for job in jobs if job.has_before or job.has_after]
+    hot = {job.job_id: job for job in with_photos if job.job_id is not None}
+    cold = {job.archived_id: job for job in with_photos if job.job_id is None}
+
+    # (fila, tipo, CloudinaryResource) en orden de subida
+    found = []
+    if hot:
+        photos = (
+            JobPhoto.objects
+            .filter(job_id__in=hot)
+            .only("job_id", "photo", "before_after")
+            .order_by("uploaded_at")
+        )
+        found += [(hot[photo.job_id], photo.before_after, photo.photo) for photo in photos]
+    if cold:
+        archived = ArchivedJob.objects.filter(pk__in=cold).values_list("id", "photos")
+        found += [
+            (cold[archived_id], photo["before_after"], CloudinaryResource(photo["photo"]))
+            for archived_id, photos in archived
+            for photo in photos
+        ]
+
+    # Primera foto de cada tipo por trabajo. Cloudinary la entrega ya reducida.
+    sources = {}
+    for job, kind, resource in found:
+        if (job, kind) in sources:
+            continue
+        sources[job, kind] = resource.build_url(
+            width=REPORT_PHOTO_SIZE[0] * 2, height=REPORT_PHOTO_SIZE[1] * 2, crop="limit",
+        )
+
+    paths = get_image_cache().thumbnails(sources.values(), REPORT_PHOTO_SIZE)
+
+    result = {}
+    for (job, kind), source in sources.items():
+        if source in paths:
+            result.setdefault(job, {})[kind] = paths[source]
+    return result
+
+
+# ==============================
+# Layout (ReportLab)
+# ==============================
+
+@lru_cache
+def report_styles():
+    styles = getSampleStyleSheet()
+
+    styles.add(ParagraphStyle(
+        name="TitleCustom",
+        fontSize=18,
+        leading=22,
+        textColor=PRIMARY_COLOR,
+        spaceAfter=12,
+        alignment=1  # center
+    ))
+
+    styles.add(ParagraphStyle(
+        name="SubtitleCustom",
+        fontSize=11,
+        italic=True,
+        spaceAfter=8,
+        alignment=1
+    ))
+
+    styles.add(ParagraphStyle(
+        name="Meta",
+        fontSize=10,
+        spaceAfter=6,
+        alignment=1
+    ))
+
+    styles.add(ParagraphStyle(
+        name="SectionTitle",
+        fontSize=14,
+        textColor=PRIMARY_COLOR,
+        spaceBefore=16,
+        spaceAfter=8
+    ))
+
+    styles.add(ParagraphStyle(
+        name="TableDescription",
+        fontSize=9,
+        leading=12,
+    ))
+    return styles
+
+
+def render_pdf(elements, subject=""):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=36,
+        leftMargin=36,
+        topMargin=36,
+        bottomMargin=36,
+        subject=subject,
+    )
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def jobs_table(jobs, styles):
+    data = [["Fecha", "Descripción", "Duración"]]
+
+    minutes = [int(job.duration) if job.duration else 0 for job in jobs]
+    dates = date_column((job.date for job in jobs), "%d/%m/%Y")
+    durations = hhmm_column(minutes)
+
+    for job, date_str, duration_str in zip(jobs, dates, durations):
+        # Paragraph interpreta marcado: un "<" suelto rompería el informe
+        desc_text = escape(job.description or "N/A")
+
+        data.append([
+            date_str,
+            Paragraph(desc_text, styles["TableDescription"]),
+            duration_str,
+        ])
+
+    table = Table(data, colWidths=[80, 300, 80], repeatRows=1)
+    table.setStyle(TableStyle([
+        # Header
+        ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+
+        # Body
+        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ]))
+    return table
+
+
+def photos_table(jobs, photos, styles):
+    width, height = REPORT_PHOTO_SIZE[0] * 0.75, REPORT_PHOTO_SIZE[1] * 0.75  # px → puntos
+
+    def cell(path):
+        if not path:
+            return ""
+        image = RLImage(str(path))
+        # Mantener proporción dentro de la caja
+        ratio = min(width / image.imageWidth, height / image.imageHeight)
+        image.drawWidth = image.imageWidth * ratio
+        image.drawHeight = image.imageHeight * ratio
+        return image
+
+    data = [["Fecha", "Antes", "Después"]]
+    for job in jobs:
+        if job in photos:
+            data.append([
+                job.date.strftime("%d/%m/%Y"),
+                cell(photos[job].get("before")),
+                cell(photos[job].get("after")),
+            ])
+
+    table = Table(data, colWidths=[80, width + 10, width + 10], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ]))
+    return table
+
+
+def render_month(month, jobs, photos):
+    """Sección de un mes: tabla de trabajos, total y fotos. El total viaja en el subject."""
+    styles = report_styles()
+    total = sum(job.duration or 0 for job in jobs)
+
+    elements = [
+        Paragraph(month_label(month.year, month.month), styles["SectionTitle"]),
+        jobs_table(jobs, styles),
+        Spacer(1, 10),
+        Paragraph(f"<b>Total del mes:</b> {hhmm(total)}", styles["Normal"]),
+    ]
+    if photos and any(job in photos for job in jobs):
+        elements.append(Paragraph("Antes / Después", styles["SectionTitle"]))
+        elements.append(photos_table(jobs, photos, styles))
+
+    return render_pdf(elements, subject=json.dumps({"jobs": len(jobs), "minutes": total}))
+
+
+def render_cover(crew, months):
+    """Portada con los totales. `months` = [(mes, minutos)] de más nuevo a más viejo."""
+    styles = report_styles()
+    now = datetime.now()
+
+    elements = [
+        Paragraph("Mantenimiento de Espacios Verdes", styles["TitleCustom"]),
+        Paragraph(
+            f"Informe de trabajos realizados – {month_label(now.year, now.month)}",
+            styles["SubtitleCustom"]
+        ),
+        Paragraph(escape(crew.report_author or crew.name), styles["Meta"]),
+        Paragraph(f"Generado: {now.strftime('%d/%m/%Y %H:%M')}", styles["Meta"]),
+        Spacer(1, 20),
+    ]
+
+    if months:
+        elements.append(Paragraph("Totales Mensuales", styles["SectionTitle"]))
+        for month, minutes in months:
+            elements.append(Paragraph(
+                f"<b>{month_label(month.year, month.month)}:</b> {hhmm(minutes)}",
+                styles["Normal"]
+            ))
+
+    total = sum(minutes for _, minutes in months)
+    if total > 0:
+        elements.append(Spacer(1, 10))
+        elements.append(Paragraph(f"Total General: {hhmm(total)}", styles["SectionTitle"]))
+
+    return render_pdf(elements)
+
+
+# ==============================
+# Motor: fragmentos por mes + informes terminados
+#
+# Cada mes se renderiza una vez por versión (la suben las señales de Job) y
+# se guarda como PDF en disco. Un informe es portada + fragmentos unidos con
+# pypdf: después de editar un trabajo sólo se re-diagrama su mes.
+# ==============================
+
+class PdfReportEngine:
+    def __init__(self, directory, fragments_max_bytes, reports_max_bytes):
+        directory = Path(directory)
+        self.fragments = LRUDirectory(directory / "fragments", fragments_max_bytes)
+        self.reports = LRUDirectory(directory / "reports", reports_max_bytes)
+
+    def fragment_key(self, crew, month, version, start, end, photos):
+        # Los límites sólo importan si cortan el mes
+        last = add_months(month, 1)
+        start = start if start and start > month else None
+        end = end if end and end < last else None
+        return f"v{LAYOUT_VERSION}|{crew.pk}|{month:%Y-%m}|{version}|{start}|{end}|photos={photos}"
+
+    def report(self, crew, months, start=None, end=None, photos=False, profile=None):
+        """
+        PDF (bytes) de la cuadrilla para `months` (primer día de cada mes,
+        de más nuevo a más viejo), opcionalmente acotado a [start, end].
+        """
+        versions = month_versions(crew.pk, months)
+        keys = {
+            month: self.fragment_key(crew, month, versions[month], start, end, photos)
+            for month in months
+        }
+
+        now = datetime.now()
+        report_key = "|".join([
+            f"v{LAYOUT_VERSION}", str(crew.pk), crew.name, crew.report_author,
+            f"{now:%Y-%m}", *keys.values(),
+        ])
+        path = self.reports.get(report_key, (".pdf",))
+        if path:
+            return path.read_bytes()
+
+        fragments = {}
+        missing = []
+        for month in months:
+            path = self.fragments.get(keys[month], (".pdf",))
+            if path:
+                fragments[month] = PdfReader(path)
+            else:
+                missing.append(month)
+
+        for month, content in self.render_months(crew, missing, start, end, photos, profile).items():
+            self.fragments.put(keys[month], content, ".pdf")
+            fragments[month] = PdfReader(BytesIO(content))
+
+        totals = []
+        writer = PdfWriter()
+        for month in months:
+            meta = json.loads(fragments[month].metadata.subject)
+            if not meta["jobs"]:
+                continue
+            totals.append((month, meta["minutes"]))
+            if profile:
+                profile.rows += meta["jobs"]
+        writer.append(PdfReader(BytesIO(render_cover(crew, totals))))
+        for month, _ in totals:
+            writer.append(fragments[month])
+
+        buffer = BytesIO()
+        writer.write(buffer)
+        content = buffer.getvalue()
+        self.reports.put(report_key, content, ".pdf")
+        return content
+
+    def render_months(self, crew, months, start, end, photos, profile):
+        """
+        {mes: fragmento} con una sola query, acotada a los tramos de meses
+        consecutivos que faltan: dos meses editados con años de diferencia
+        no leen lo del medio.
+        """
+        if not months:
+            return {}
+
+        fetch = profile.fetching() if profile else nullcontext()
+        # Los fragmentos no vencen: se leen del primario, no de una réplica
+        # atrasada que dejaría filas viejas bajo la versión nueva del mes
+        with fetch, primary_reads():
+            ranges = [
+                (
+                    max(filter(None, [first, start])),
+                    min(filter(None, [add_months(last, 1) - timedelta(days=1), end])),
+                )
+                for first, last in month_runs(months)
+            ]
+            by_month = defaultdict(list)
+            for job in Job.objects.history(crew=crew, ranges=ranges):
+                by_month[job.date.replace(day=1)].append(job)
+            report_photo_paths = report_photos(
+                [job for jobs in by_month.values() for job in jobs]
+            ) if photos else {}
+
+        return {
+            month: render_month(month, by_month[month], report_photo_paths)
+            for month in months
+        }
+
+
+def month_runs(months):
+    """Meses (primer día) → [(primero, último)] de tramos consecutivos."""
+    runs = []
+    for month in sorted(months):
+        if runs and add_months(runs[-1][1], 1) == month:
+            runs[-1][1] = month
+        else:
+            runs.append([month, month])
+    return [tuple(run) for run in runs]
+
+
+@lru_cache
+def get_report_engine():
+    config = settings.PDF_REPORTS
+    return PdfReportEngine(config["DIR"], config["FRAGMENTS_MAX_BYTES"], config["REPORTS_MAX_BYTES"])
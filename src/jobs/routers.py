@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# ¿El request actual puede leer de la réplica? Lo decide el middleware
+# (jobs.middleware.replica); las vistas de lectura lo activan con
+# `replica_reads()`.
+replica_allowed = ContextVar("replica_allowed", default=False)
+use_replica = ContextVar("use_replica", default=False)
+
+
+def current_read_alias():
+    if use_replica.get() and replica_allowed.get() and settings.DATABASE_READ_REPLICA:
+        return settings.DATABASE_READ_REPLICA
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def replica_reads():
+    token = use_replica.set(True)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Vuelve al primario dentro de un bloque de `replica_reads()`: para lo que
+    se guarda sin vencimiento (fragmentos del PDF), donde el atraso de la
+    réplica no se corrige solo.
+    """
+    token = use_replica.set(False)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Lecturas de listados, detalle, agregados y exportaciones → réplica
+    (si DATABASE_READ_REPLICA está configurada). Todo lo demás, incluidas
+    las escrituras y el admin, va al primario.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Misma base lógica: la réplica es copia del primario
+        return True
@@ -0,0 +1,250 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from .cache import bump_data_version, bump_month_versions
+from .middleware.crew import crew_cache_key
+from .models import Crew, Job, JobPhoto, Tag
+from .tags import TagDelta, job_tag_states
+
+
+# ==============================
+# Cambios masivos (p. ej. `archive_jobs`)
+# ==============================
+
+_bulk = ContextVar("jobs_bulk_changes", default=False)
+
+
+@contextmanager
+def bulk_changes():
+    """
+    Suspende los resúmenes y la invalidación fila por fila; invalida una
+    sola vez al salir (al confirmar, si hay una transacción abierta). Quien
+    lo usa se encarga de dejar los resúmenes bien.
+    """
+    token = _bulk.set(True)
+    try:
+        yield
+    finally:
+        _bulk.reset(token)
+        transaction.on_commit(bump_data_version)
+
+
+# ==============================
+# Resumen de fotos (Job.photo_count / has_before / has_after)
+# ==============================
+
+@receiver(pre_save, sender=JobPhoto)
+def remember_previous_job(sender, instance, **kwargs):
+    if _bulk.get():
+        return
+    # Si la foto se mueve de trabajo hay que actualizar también el anterior
+    if instance.pk:
+        instance._previous_job_id = (
+            JobPhoto.objects.filter(pk=instance.pk).values_list('job_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=JobPhoto)
+@receiver(post_delete, sender=JobPhoto)
+def update_photo_summary(sender, instance, **kwargs):
+    if _bulk.get():
+        return
+    job_ids = {instance.job_id, getattr(instance, '_previous_job_id', None)} - {None}
+    jobs = list(Job.objects.filter(pk__in=job_ids))
+    for job in jobs:
+        job.refresh_photo_summary()
+    # Las fotos salen en el PDF con ?photos=1
+    bump_months_on_commit((job.crew_id, job.date) for job in jobs)
+
+
+# ==============================
+# Resumen de etiquetas (Job.tag_names)
+# ==============================
+
+def refresh_tag_summaries(job_ids):
+    """Job.tag_names de muchos trabajos: una query a la tabla intermedia y un UPDATE por lote."""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return
+    names = defaultdict(list)
+    for job_id, name in (
+        Job.tags.through.objects
+        .filter(job_id__in=job_ids)
+        .order_by('tag__name')
+        .values_list('job_id', 'tag__name')
+    ):
+        names[job_id].append(name)
+    Job.objects.bulk_update(
+        [Job(pk=job_id, tag_names=",".join(names[job_id])) for job_id in job_ids],
+        ['tag_names'], batch_size=500,
+    )
+
+
+@receiver(m2m_changed, sender=Job.tags.through)
+def update_tag_summary(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # job.tags.add(...) / remove / clear
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.refresh_tag_summary()
+        return
+
+    # tag.jobs.add(...): pk_set son ids de trabajos
+    if action == 'pre_clear':
+        instance._summary_job_ids = list(instance.jobs.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        refresh_tag_summaries(pk_set)
+    elif action == 'post_clear':
+        refresh_tag_summaries(instance._summary_job_ids)
+
+
+@receiver(post_save, sender=Tag)
+def update_renamed_tag(sender, instance, created, **kwargs):
+    if not created:
+        refresh_tag_summaries(instance.jobs.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_jobs(sender, instance, **kwargs):
+    instance._summary_job_ids = list(instance.jobs.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def update_deleted_tag(sender, instance, **kwargs):
+    refresh_tag_summaries(instance._summary_job_ids)
+
+
+# ==============================
+# Versión por mes de los fragmentos del PDF (jobs/reports.py)
+# ==============================
+
+def bump_months_on_commit(pairs):
+    """
+    Invalida los meses cuando la transacción confirma: un PDF pedido antes
+    lee las filas viejas y guardaría el fragmento bajo la versión nueva.
+    """
+    months = list(pairs)
+    transaction.on_commit(lambda: bump_month_versions(months))
+
+
+@receiver(pre_save, sender=Job)
+def remember_previous_state(sender, instance, **kwargs):
+    # Si cambia la fecha o la cuadrilla hay que invalidar también el mes
+    # anterior; si cambia la duración o la cuadrilla, mover los conteos
+    if instance.pk and not _bulk.get():
+        instance._previous_state = (
+            Job.objects.filter(pk=instance.pk).values_list('crew_id', 'date', 'duration').first()
+        )
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def bump_job_month(sender, instance, **kwargs):
+    if _bulk.get():
+        return
+    months = [(instance.crew_id, instance.date)]
+    previous = getattr(instance, '_previous_state', None)
+    if previous:
+        months.append(previous[:2])
+    bump_months_on_commit(months)
+
+
+# ==============================
+# Conteos y co-ocurrencias de etiquetas (TagStat / TagPair, ver jobs/tags.py)
+# ==============================
+
+@receiver(m2m_changed, sender=Job.tags.through)
+def update_tag_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    if _bulk.get():
+        return
+    # Se guarda el estado de los trabajos afectados antes y se compara después
+    if action.startswith('pre_'):
+        if not reverse:
+            job_ids = [instance.pk]
+        elif action == 'pre_clear':
+            job_ids = list(instance.jobs.values_list('pk', flat=True))
+        else:
+            job_ids = list(pk_set)
+        instance._tag_states = (job_ids, job_tag_states(job_ids))
+        return
+
+    job_ids, before = instance._tag_states
+    delta = TagDelta()
+    delta.change(before, job_tag_states(job_ids))
+    delta.apply()
+
+
+@receiver(post_save, sender=Job)
+def move_job_tag_stats(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if created or _bulk.get() or not previous:
+        return
+    crew_id, _, duration = previous
+    if (crew_id, duration) == (instance.crew_id, instance.duration):
+        return
+    states = job_tag_states([instance.pk])
+    if states:
+        _, _, tag_ids = states[instance.pk]
+        delta = TagDelta()
+        delta.remove(crew_id, tag_ids, duration)
+        delta.add(instance.crew_id, tag_ids, instance.duration)
+        delta.apply()
+
+
+@receiver(pre_delete, sender=Job)
+def remember_job_tags(sender, instance, **kwargs):
+    # Las filas de la tabla intermedia se borran en cascada, sin m2m_changed
+    if not _bulk.get():
+        instance._deleted_tag_states = job_tag_states([instance.pk])
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_tag_stats(sender, instance, **kwargs):
+    if _bulk.get():
+        return
+    delta = TagDelta()
+    delta.change(getattr(instance, '_deleted_tag_states', {}), {})
+    delta.apply()
+
+
+# ==============================
+# Invalidación de lo cacheado (jobs/cache.py)
+# ==============================
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=JobPhoto)
+@receiver(post_delete, sender=JobPhoto)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Job.tags.through)
+def invalidate_computed(sender, **kwargs):
+    if _bulk.get():
+        return
+    # Al confirmar: un cached() que recalcule antes leería lo viejo y lo
+    # guardaría bajo la versión nueva hasta que venza
+    if kwargs.get('action', 'post_').startswith('post_'):
+        transaction.on_commit(bump_data_version)
+
+
+# ==============================
+# Cuadrillas (cache de jobs/middleware/crew.py)
+# ==============================
+
+@receiver(pre_save, sender=Crew)
+def remember_previous_slug(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_slug = Crew.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Crew)
+@receiver(post_delete, sender=Crew)
+def invalidate_crew(sender, instance, **kwargs):
+    # Con un slug renombrado también se borra la clave vieja
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)} - {None}
+    cache.delete_many([crew_cache_key(slug) for slug in slugs])
@@ -0,0 +1,171 @@
+from collections import Counter, defaultdict
+from itertools import permutations
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import Job, TagPair, TagStat
+
+# Tabla intermedia de Job.tags (job_id, tag_id). Tiene un índice cubriente
+# (tag_id, job_id), ver migración 0005: los filtros por etiqueta no tocan jobs_job.
+JobTag = Job.tags.through
+
+
+# ==============================
+# Filtro del listado (/jobs/?tag=poda&tag=riego&mode=and|or)
+# ==============================
+
+def filter_by_tags(queryset, names, match_all=True):
+    """
+    Trabajos con todas (`match_all`) o alguna de las etiquetas `names`.
+    Un solo `pk IN (subquery)` sobre la tabla intermedia: sin un JOIN por
+    etiqueta ni DISTINCT sobre los trabajos. Para "todas" se agrupa por
+    trabajo y se pide que estén las n.
+    """
+    names = sorted(set(names))
+    through = JobTag.objects.filter(tag__name__in=names)
+    if match_all and len(names) > 1:
+        # (job_id, tag_id) es único: COUNT cuenta etiquetas distintas
+        through = (
+            through.values('job_id')
+            .annotate(matched=Count('tag_id'))
+            .filter(matched=len(names))
+        )
+    return queryset.filter(pk__in=through.values('job_id'))
+
+
+def related_tags(crew, names, limit=8):
+    """[(etiqueta, trabajos en común)] que más aparecen junto a `names`."""
+    return list(
+        TagPair.objects
+        .filter(crew=crew, tag__name__in=names, job_count__gt=0)
+        .exclude(other__name__in=names)
+        .values_list('other__name')
+        .annotate(together=Sum('job_count'))
+        .order_by('-together', 'other__name')[:limit]
+    )
+
+
+def crew_tag_stats(crew):
+    """[{name, job_count, total_minutes}] de la cuadrilla, las más usadas primero."""
+    return list(
+        TagStat.objects
+        .filter(crew=crew, job_count__gt=0)
+        .values('job_count', 'total_minutes', name=F('tag__name'))
+        .order_by('-job_count', 'tag__name')
+    )
+
+
+# ==============================
+# Mantenimiento incremental (lo llaman jobs/signals.py, archive y seed_jobs)
+# ==============================
+
+def job_tag_states(job_ids):
+    """{job_id: (crew_id, duración, {tag_id})} con una query sobre la tabla intermedia."""
+    states = {}
+    rows = (
+        JobTag.objects
+        .filter(job_id__in=list(job_ids))
+        .values_list('job_id', 'job__crew_id', 'job__duration', 'tag_id')
+    )
+    for job_id, crew_id, duration, tag_id in rows:
+        states.setdefault(job_id, (crew_id, duration, set()))[2].add(tag_id)
+    return states
+
+
+class TagDelta:
+    """
+    Cambios a sumar en TagStat / TagPair. Se resta el estado viejo de cada
+    trabajo y se suma el nuevo: lo que no cambió se cancela antes de escribir.
+    """
+
+    def __init__(self):
+        self.stats = defaultdict(lambda: [0, 0])
+        self.pairs = Counter()
+
+    def add(self, crew_id, tag_ids, minutes, sign=1):
+        for tag_id in tag_ids:
+            stat = self.stats[crew_id, tag_id]
+            stat[0] += sign
+            stat[1] += sign * (minutes or 0)
+        for tag_id, other_id in permutations(tag_ids, 2):
+            self.pairs[crew_id, tag_id, other_id] += sign
+
+    def remove(self, crew_id, tag_ids, minutes):
+        self.add(crew_id, tag_ids, minutes, sign=-1)
+
+    def change(self, before, after):
+        """`before` / `after`: {job_id: (crew_id, duración, {tag_id})}."""
+        for crew_id, duration, tag_ids in before.values():
+            self.remove(crew_id, tag_ids, duration)
+        for crew_id, duration, tag_ids in after.values():
+            self.add(crew_id, tag_ids, duration)
+
+    def apply(self):
+        stats = {key: value for key, value in self.stats.items() if any(value)}
+        pairs = {key: count for key, count in self.pairs.items() if count}
+        if not stats and not pairs:
+            return
+
+        with transaction.atomic():
+            if stats:
+                TagStat.objects.bulk_create(
+                    [TagStat(crew_id=crew_id, tag_id=tag_id) for crew_id, tag_id in stats],
+                    ignore_conflicts=True,
+                )
+                for (crew_id, tag_id), (jobs, minutes) in stats.items():
+                    TagStat.objects.filter(crew_id=crew_id, tag_id=tag_id).update(
+                        job_count=F('job_count') + jobs,
+                        total_minutes=F('total_minutes') + minutes,
+                    )
+
+            if pairs:
+                TagPair.objects.bulk_create(
+                    [TagPair(crew_id=c, tag_id=t, other_id=o) for c, t, o in pairs],
+                    ignore_conflicts=True,
+                )
+                # Un UPDATE por etiqueta y delta, no uno por par
+                grouped = defaultdict(list)
+                for (crew_id, tag_id, other_id), count in pairs.items():
+                    grouped[crew_id, tag_id, count].append(other_id)
+                for (crew_id, tag_id, count), others in grouped.items():
+                    TagPair.objects.filter(
+                        crew_id=crew_id, tag_id=tag_id, other_id__in=others,
+                    ).update(job_count=F('job_count') + count)
+
+
+def rebuild_tag_stats():
+    """Recalcula TagStat y TagPair desde cero con dos agregados. Devuelve (conteos, pares)."""
+    stats = (
+        JobTag.objects
+        .values('tag_id', crew_id=F('job__crew_id'))
+        .annotate(jobs=Count('job_id'), minutes=Sum('job__duration'))
+        .order_by()
+    )
+    pairs = (
+        JobTag.objects
+        .annotate(crew_id=F('job__crew_id'), other_id=F('job__tags__id'))
+        .exclude(other_id=F('tag_id'))
+        .values('crew_id', 'tag_id', 'other_id')
+        .annotate(jobs=Count('job_id'))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        TagStat.objects.all().delete()
+        TagPair.objects.all().delete()
+        created_stats = TagStat.objects.bulk_create([
+            TagStat(
+                crew_id=row['crew_id'], tag_id=row['tag_id'],
+                job_count=row['jobs'], total_minutes=row['minutes'] or 0,
+            )
+            for row in stats
+        ], batch_size=1000)
+        created_pairs = TagPair.objects.bulk_create([
+            TagPair(
+                crew_id=row['crew_id'], tag_id=row['tag_id'],
+                other_id=row['other_id'], job_count=row['jobs'],
+            )
+            for row in pairs
+        ], batch_size=1000)
+    return len(created_stats), len(created_pairs)
@@ -1,11 +1,13 @@
 from django import template
 
+from jobs.formatting import month_label_of, short_duration
+
 register = template.Library()
 
 @register.filter
 def duration(value):
     """
-    Convierte minutos → 'Xh Ym'
+    Convierte minutos → 'Xh Ym' (cadenas precalculadas, ver jobs/formatting.py)
     """
     if value is None:
         return ""
@@ -15,16 +17,17 @@ def duration(value):
     except:
         return value
 
-    hours = value // 60
-    minutes = value % 60
+    return short_duration(value)
+
+
+@register.filter
+def month_label(value):
+    """Fecha → 'Marzo 2025' (etiquetas precalculadas, ver jobs/formatting.py)"""
+    if not value:
+        return ""
+    return month_label_of(value)
+
 
-    if hours > 0 and minutes > 0:
-        return f"{hours}h {minutes}m"
-    elif hours > 0:
-        return f"{hours}h"
-    else:
-        return f"{minutes}m"
-    
 @register.filter
 def get_after(photos, before_photo):
     """Devuelve la foto AFTER correspondiente a una BEFORE (si existe)."""
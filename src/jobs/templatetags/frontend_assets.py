@@ -0,0 +1,11 @@
+from django import template
+
+from jobs.frontend import vendor_url as resolve_vendor_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_url(name):
+    """Devuelve la URL de una librería vendorizada (ver jobs/frontend.py)."""
+    return resolve_vendor_url(name)
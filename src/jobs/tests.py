@@ -1,3 +1,1210 @@
-from django.test import TestCase
+import datetime
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import cloudinary
+from pypdf import PdfReader
+from openpyxl import load_workbook
+from PIL import Image
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.db import connection
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .cache_backends import SQLiteCache
+from .cache import cache_metrics, cached, data_version
+from .db import session_statement_timeout, statement_timeout
+from .management.commands.bench_endpoints import ENDPOINTS
+from .formatting import date_column, hhmm, hhmm_column, month_label, month_labels, short_duration
+from .frontend import VENDOR_ASSETS, check_vendored_assets, page_assets, vendor_path, vendor_url
+from .image_cache import LRUDirectory, get_image_cache
+from .archive import archive_cutoff, archive_jobs, monthly_totals
+from .middleware.crew import crew_cache_key, lookup_crew
+from .management.commands.bench_formatting import legacy_hhmm, legacy_month, legacy_short
+from . import reports
+from .reports import get_report_engine
+from .routers import replica_allowed, replica_reads
+from .models import ArchivedJob, Crew, Job, JobPhoto, MonthlySummary, Tag, TagPair, TagStat
+from .signals import bulk_changes
+from .tags import rebuild_tag_stats
+
+# Las URLs de Cloudinary se arman localmente, alcanza con un cloud_name
+cloudinary.config(cloud_name="test")
+
+
+class JobsTestCase(TestCase):
+    """
+    La cache no se revierte con la transacción del test: se limpia. La
+    cuadrilla queda cacheada como entre requests reales (CrewMiddleware).
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.crew = lookup_crew(settings.DEFAULT_CREW_SLUG)
+
+        # Miniaturas, informes y volcados en un directorio temporal, no en .cache/
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        override = override_settings(
+            IMAGE_CACHE={**settings.IMAGE_CACHE, "DIR": os.path.join(cache_dir.name, "images")},
+            PDF_REPORTS={**settings.PDF_REPORTS, "DIR": os.path.join(cache_dir.name, "reports")},
+            EXPORT_PROFILING={**settings.EXPORT_PROFILING, "DIR": os.path.join(cache_dir.name, "profiles")},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        for engine in (get_image_cache, get_report_engine):
+            engine.cache_clear()
+            self.addCleanup(engine.cache_clear)
+
+
+def make_job(**kwargs):
+    data = {
+        "date": datetime.date(2025, 3, 10),
+        "location": "exterior",
+        "duration": 90,
+        "description": "Corte de césped",
+    }
+    data.update(kwargs)
+    data.setdefault("crew", lookup_crew(settings.DEFAULT_CREW_SLUG))
+    return Job.objects.create(**data)
+
+
+# ==============================
+# FRONTEND
+# ==============================
+
+class JobDetailAssetsTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = make_job()
+        JobPhoto.objects.create(job=self.job, photo="job_photos/a", before_after="before")
+        JobPhoto.objects.create(job=self.job, photo="job_photos/b", before_after="after")
+
+    def test_photoswipe_is_not_loaded_upfront(self):
+        response = self.client.get(reverse("job-detail", args=[self.job.pk]))
+        urls = [a["url"] for a in page_assets(response.content.decode())]
+
+        self.assertFalse([url for url in urls if "photoswipe" in url])
+        self.assertEqual(len([url for url in urls if "swiper-bundle" in url]), 2)
+
+    def test_only_first_slide_is_eager(self):
+        response = self.client.get(reverse("job-detail", args=[self.job.pk]))
+        html = response.content.decode()
+
+        self.assertEqual(html.count('loading="eager"'), 1)
+        self.assertEqual(html.count('loading="lazy"'), 1)
+        self.assertIn('rel="preload" as="image"', html)
+
+
+class VendorUrlTests(TestCase):
+    def tearDown(self):
+        vendor_url.cache_clear()
+
+    def test_falls_back_to_cdn_when_not_vendored(self):
+        with tempfile.TemporaryDirectory() as static_dir:
+            with override_settings(STATICFILES_DIRS=[static_dir]):
+                vendor_url.cache_clear()
+                self.assertTrue(vendor_url("swiper.js").startswith("https://cdn.jsdelivr.net/"))
+
+    def test_uses_local_file_when_vendored(self):
+        with tempfile.TemporaryDirectory() as static_dir:
+            target = Path(static_dir) / "vendor/swiper/swiper-bundle.min.js"
+            target.parent.mkdir(parents=True)
+            target.write_text("/* swiper */")
+
+            with override_settings(STATICFILES_DIRS=[static_dir]):
+                vendor_url.cache_clear()
+                self.assertEqual(vendor_url("swiper.js"), "/static/vendor/swiper/swiper-bundle.min.js")
+
+    def test_deploy_check_requires_vendored_assets(self):
+        with tempfile.TemporaryDirectory() as static_dir:
+            with override_settings(STATICFILES_DIRS=[static_dir]):
+                errors = check_vendored_assets(None)
+                self.assertEqual([error.id for error in errors], ["jobs.E001"])
+
+                for name in VENDOR_ASSETS:
+                    target = Path(static_dir) / vendor_path(name)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.write_text("/* vendor */")
+                self.assertEqual(check_vendored_assets(None), [])
+
+    def test_deploy_check_is_registered(self):
+        with tempfile.TemporaryDirectory() as static_dir:
+            with override_settings(STATICFILES_DIRS=[static_dir]):
+                with self.assertRaisesMessage(SystemCheckError, "jobs.E001"):
+                    call_command("check", deploy=True, fail_level="ERROR", stdout=StringIO(), stderr=StringIO())
+
+
+# ==============================
+# BASE DE DATOS
+# ==============================
+
+class StatementTimeoutTests(SimpleTestCase):
+    def fake_connection(self, vendor):
+        connection = mock.MagicMock(vendor=vendor)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        return connection, cursor
+
+    def test_export_timeout_is_local_to_a_transaction(self):
+        connection, cursor = self.fake_connection("postgresql")
+
+        with mock.patch("jobs.db.connections", {"default": connection}), \
+                mock.patch("jobs.db.transaction") as transaction:
+            with statement_timeout("export"):
+                transaction.atomic.assert_called_once_with(using="default")
+
+        # SET LOCAL: se descarta con la transacción, sin RESET
+        calls = cursor.execute.call_args_list
+        self.assertEqual(len(calls), 1)
+        self.assertIn("set_config('statement_timeout', %s, true)", calls[0].args[0])
+        self.assertEqual(calls[0].args[1], [str(settings.DB_STATEMENT_TIMEOUTS["export"])])
+
+    def test_web_timeout_comes_from_the_connection(self):
+        connection, cursor = self.fake_connection("postgresql")
+
+        with mock.patch("jobs.db.connections", {"default": connection}):
+            with statement_timeout("web"):
+                pass
+
+        cursor.execute.assert_not_called()
+
+    def test_commands_lift_the_connection_timeout(self):
+        connection, cursor = self.fake_connection("postgresql")
+
+        with mock.patch("jobs.db.connections", {"default": connection}):
+            with session_statement_timeout("command"):
+                self.assertEqual(len(cursor.execute.call_args_list), 1)
+
+        (set_call, reset_call) = cursor.execute.call_args_list
+        self.assertIn("set_config('statement_timeout', %s, false)", set_call.args[0])
+        self.assertEqual(set_call.args[1], [str(settings.DB_STATEMENT_TIMEOUTS["command"])])
+        self.assertEqual(reset_call.args[0], "RESET statement_timeout")
+
+    def test_noop_on_sqlite(self):
+        connection, cursor = self.fake_connection("sqlite")
+
+        with mock.patch("jobs.db.connections", {"default": connection}):
+            with statement_timeout("web"):
+                pass
+
+        cursor.execute.assert_not_called()
+
+
+class CommandTimeoutTests(JobsTestCase):
+    def test_long_commands_use_the_command_timeout(self):
+        commands = [
+            ("archive_jobs", {"dry_run": True}),
+            ("backfill_job_summaries", {}),
+            ("rebuild_tag_stats", {}),
+            ("seed_jobs", {"rows": 0}),
+        ]
+        for name, options in commands:
+            with self.subTest(command=name), mock.patch("jobs.db.session_statement_timeout") as timeout:
+                call_command(name, stdout=StringIO(), **options)
+                timeout.assert_called_once_with("command")
+
+
+class HealthCheckTests(JobsTestCase):
+    def test_no_pool_stats_without_pool(self):
+        data = self.client.get(reverse("health_check")).json()
+
+        self.assertEqual(data["status"], "ok")
+        self.assertNotIn("db_pool", data)
+
+
+# ==============================
+# RESUMEN DESNORMALIZADO
+# ==============================
+
+class JobSummaryTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = make_job()
+
+    def test_photos_update_summary(self):
+        photo = JobPhoto.objects.create(job=self.job, photo="job_photos/a", before_after="before")
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.photo_count, self.job.has_before, self.job.has_after), (1, True, False))
+
+        photo.delete()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.photo_count, self.job.has_before), (0, False))
+
+    def test_tags_update_summary_from_both_sides(self):
+        poda, riego = Tag.objects.create(name="poda"), Tag.objects.create(name="riego")
+
+        self.job.tags.add(riego, poda)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.tag_list, ["poda", "riego"])
+
+        riego.jobs.clear()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.tag_names, "poda")
+
+        poda.name = "poda-alta"
+        poda.save()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.tag_names, "poda-alta")
+
+        poda.delete()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.tag_names, "")
+
+    def test_tag_names_cannot_have_commas(self):
+        with self.assertRaises(ValidationError):
+            Tag(name="poda,riego").full_clean()
+
+    def test_renaming_a_tag_updates_its_jobs_in_one_batch(self):
+        poda = Tag.objects.create(name="poda")
+        jobs = [self.job] + [make_job() for _ in range(4)]
+        poda.jobs.add(*jobs)
+
+        poda.name = "poda-alta"
+        with CaptureQueriesContext(connection) as queries:
+            poda.save()
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "jobs_job"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(set(Job.objects.values_list("tag_names", flat=True)), {"poda-alta"})
+
+    def test_backfill(self):
+        JobPhoto.objects.create(job=self.job, photo="job_photos/a", before_after="after")
+        self.job.tags.add(Tag.objects.create(name="poda"))
+        Job.objects.update(photo_count=0, has_after=False, tag_names="")
+
+        call_command("backfill_job_summaries", stdout=StringIO())
+
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.photo_count, self.job.has_after, self.job.tag_names), (1, True, "poda"))
+
+    def test_list_query_count_does_not_grow_with_badges(self):
+        for i in range(10):
+            job = make_job(duration=30 + i)
+            JobPhoto.objects.create(job=job, photo=f"job_photos/{i}", before_after="before")
+            job.tags.add(Tag.objects.get_or_create(name=f"tag{i % 3}")[0])
+
+        # count del paginador + página + totales mensuales + conteos por etiqueta
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("job-list"))
+        self.assertContains(response, "#tag0")
+
+
+# ==============================
+# ETIQUETAS (TagStat / TagPair)
+# ==============================
+
+def tag_snapshot():
+    stats = set(
+        TagStat.objects.filter(job_count__gt=0)
+        .values_list('crew_id', 'tag__name', 'job_count', 'total_minutes')
+    )
+    pairs = set(
+        TagPair.objects.filter(job_count__gt=0)
+        .values_list('crew_id', 'tag__name', 'other__name', 'job_count')
+    )
+    return stats, pairs
+
+
+class TagStatsTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.poda, self.riego, self.cerco = (
+            Tag.objects.create(name=name) for name in ("poda", "riego", "cerco")
+        )
+
+    def assertMatchesRebuild(self):
+        maintained = tag_snapshot()
+        rebuild_tag_stats()
+        self.assertEqual(maintained, tag_snapshot())
+
+    def test_counts_follow_tag_changes_from_both_sides(self):
+        a, b = make_job(duration=60), make_job(duration=30)
+        a.tags.add(self.poda, self.riego)
+        self.riego.jobs.add(b)
+        self.cerco.jobs.add(a, b)
+        self.assertIn((self.crew.pk, "riego", 2, 90), tag_snapshot()[0])
+        self.assertIn((self.crew.pk, "riego", "cerco", 2), tag_snapshot()[1])
+        self.assertMatchesRebuild()
+
+        a.tags.remove(self.riego)
+        self.cerco.jobs.clear()
+        self.assertEqual(tag_snapshot(), (
+            {(self.crew.pk, "poda", 1, 60), (self.crew.pk, "riego", 1, 30)}, set(),
+        ))
+        self.assertMatchesRebuild()
+
+    def test_counts_follow_job_edits_and_deletes(self):
+        other = Crew.objects.create(name="Norte", slug="norte")
+        a, b = make_job(duration=60), make_job(duration=30)
+        a.tags.add(self.poda, self.riego)
+        b.tags.add(self.poda)
+
+        a.duration = 120
+        a.save()
+        b.crew = other
+        b.save()
+        self.assertMatchesRebuild()
+        self.assertIn((self.crew.pk, "poda", 1, 120), tag_snapshot()[0])
+
+        a.delete()
+        self.assertEqual(tag_snapshot(), ({(other.pk, "poda", 1, 30)}, set()))
+
+    def test_archive_and_seed_keep_counts(self):
+        call_command("seed_jobs", rows=30, years=4, stdout=StringIO())
+        self.assertMatchesRebuild()
+
+        archive_jobs(archive_cutoff(24))
+        self.assertMatchesRebuild()
+
+    def test_filter_and_or_without_distinct(self):
+        both, only_poda, only_riego = make_job(), make_job(), make_job()
+        both.tags.add(self.poda, self.riego)
+        only_poda.tags.add(self.poda)
+        only_riego.tags.add(self.riego)
+
+        url = reverse("job-list")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"tag": ["poda", "riego"]})
+        self.assertEqual([job.pk for job in response.context["jobs"]], [both.pk])
+        self.assertFalse([q["sql"] for q in queries if "DISTINCT" in q["sql"]])
+
+        response = self.client.get(url, {"tag": ["poda", "riego"], "mode": "or"})
+        self.assertEqual(
+            {job.pk for job in response.context["jobs"]}, {both.pk, only_poda.pk, only_riego.pk},
+        )
+
+        response = self.client.get(url, {"tag": ["poda", "no-existe"]})
+        self.assertEqual(list(response.context["jobs"]), [])
+
+    def test_list_shows_tag_hours_and_related_tags(self):
+        for duration in (60, 45):
+            make_job(duration=duration).tags.add(self.poda, self.riego)
+        make_job(duration=30).tags.add(self.poda, self.cerco)
+
+        response = self.client.get(reverse("job-list"), {"tag": "poda"})
+
+        self.assertEqual(response.context["tag_filter"][0]["total_minutes"], 135)
+        self.assertEqual(
+            [(tag["name"], tag["job_count"]) for tag in response.context["related_tags"]],
+            [("riego", 2), ("cerco", 1)],
+        )
+        self.assertContains(response, "?tag=poda&amp;tag=riego")
+
+    def test_pagination_keeps_filter(self):
+        for _ in range(11):
+            make_job().tags.add(self.poda, self.riego)
+
+        response = self.client.get(reverse("job-list"), {"tag": ["poda", "riego"], "mode": "or"})
+
+        self.assertContains(response, "?tag=poda&amp;tag=riego&amp;mode=or&amp;page=2")
+
+    def test_rebuild_command(self):
+        make_job().tags.add(self.poda, self.riego)
+        TagStat.objects.all().delete()
+
+        call_command("rebuild_tag_stats", stdout=StringIO())
+
+        self.assertEqual(TagStat.objects.count(), 2)
+        self.assertEqual(TagPair.objects.count(), 2)
+
+
+# ==============================
+# BENCHMARKS
+# ==============================
+
+class EndpointQueryBudgetTests(JobsTestCase):
+    """Mismos presupuestos que `bench_endpoints`: no crecen con la cantidad de filas."""
+
+    def setUp(self):
+        super().setUp()
+        call_command("seed_jobs", rows=40, stdout=StringIO())
+        self.job = Job.objects.first()
+
+    def test_query_budgets(self):
+        for name, budget in ENDPOINTS:
+            url = reverse(name, args=[self.job.pk]) if name == "job-detail" else reverse(name)
+            with self.subTest(endpoint=name):
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertLessEqual(len(queries), budget)
+
+    def test_seed_keeps_summaries_consistent(self):
+        self.assertEqual(Job.objects.count(), 40)
+        self.assertEqual(JobPhoto.objects.count(), 80)
+        self.assertFalse(Job.objects.filter(tag_names="").exists())
+
+    def test_clear_does_not_touch_rows_one_by_one(self):
+        call_command("seed_jobs", rows=40, years=4, stdout=StringIO())
+        archive_jobs(archive_cutoff(24))
+
+        # Un DELETE por tabla: no crece con los trabajos que se borran
+        with CaptureQueriesContext(connection) as queries:
+            call_command("seed_jobs", rows=0, clear=True, stdout=StringIO())
+        self.assertLess(len(queries), 40)
+
+        for model in (Job, JobPhoto, ArchivedJob, MonthlySummary, TagStat, TagPair):
+            self.assertFalse(model.objects.exists(), model)
+
+
+# ==============================
+# CACHE DE IMÁGENES
+# ==============================
+
+FETCHED = []
+FETCH_LOCK = threading.Lock()
+
+
+def fake_fetch(source):
+    """Reemplaza a Cloudinary en los tests: genera una imagen local."""
+    with FETCH_LOCK:
+        FETCHED.append(source)
+    if source.endswith("missing"):
+        raise OSError("404")
+    output = BytesIO()
+    Image.new("RGB", (800, 600), "green").save(output, "JPEG")
+    if source.endswith("corrupt"):
+        # Cabecera válida, datos cortados: falla recién al decodificar
+        return output.getvalue()[:len(output.getvalue()) // 2]
+    return output.getvalue()
+
+
+class ImageCacheTestMixin:
+    def setUp(self):
+        super().setUp()
+        FETCHED.clear()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        config = {
+            "DIR": self.cache_dir.name,
+            "MAX_BYTES": 10 * 1024 * 1024,
+            "FETCHER": "jobs.tests.fake_fetch",
+            "WORKERS": 4,
+        }
+        self.settings_override = override_settings(IMAGE_CACHE=config)
+        self.settings_override.enable()
+        get_image_cache.cache_clear()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        get_image_cache.cache_clear()
+        self.cache_dir.cleanup()
+        super().tearDown()
+
+
+class ImageCacheTests(ImageCacheTestMixin, SimpleTestCase):
+    def test_thumbnails_are_built_once(self):
+        cache = get_image_cache()
+        first = cache.thumbnails(["a", "b", "missing"], (100, 100))
+        second = cache.thumbnails(["a", "b"], (100, 100))
+
+        self.assertEqual(first, second)
+        self.assertEqual(sorted(FETCHED), ["a", "b", "missing"])
+        self.assertNotIn("missing", first)
+        with Image.open(first["a"]) as image:
+            self.assertLessEqual(max(image.size), 100)
+
+    def test_corrupt_image_is_skipped(self):
+        paths = get_image_cache().thumbnails(["a", "corrupt"], (100, 100))
+
+        self.assertEqual(list(paths), ["a"])
+
+    def test_lru_eviction_keeps_recent_entries(self):
+        storage = LRUDirectory(self.cache_dir.name, max_bytes=250)
+        old = storage.put("old", b"x" * 100, ".bin")
+        storage.put("recent", b"x" * 100, ".bin")
+        os.utime(old, (0, 0))
+
+        storage.put("new", b"x" * 100, ".bin")
+
+        self.assertIsNone(storage.get("old", [".bin"]))
+        self.assertIsNotNone(storage.get("recent", [".bin"]))
+        self.assertIsNotNone(storage.get("new", [".bin"]))
+
+
+class PhotoReportTests(ImageCacheTestMixin, JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        job = make_job()
+        JobPhoto.objects.create(job=job, photo="job_photos/a", before_after="before")
+        JobPhoto.objects.create(job=job, photo="job_photos/b", before_after="after")
+        make_job(description="Sin fotos")
+        old = make_job(date=datetime.date(2023, 5, 2), description="Viejo")
+        JobPhoto.objects.create(job=old, photo="job_photos/old", before_after="before")
+
+    def test_only_photos_of_exported_jobs_are_read(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("export-xlsx") + "?photos=1&start=2025-01-01")
+        self.assertEqual(len(load_workbook(BytesIO(response.content))["Fotos"]._images), 2)
+        self.assertFalse([source for source in FETCHED if "old" in source])
+
+        photo_queries = [q["sql"] for q in queries if "jobs_jobphoto" in q["sql"]]
+        self.assertEqual(len(photo_queries), 1)
+        self.assertIn('"job_id" IN', photo_queries[0])
+
+    def test_xlsx_embeds_photos(self):
+        response = self.client.get(reverse("export-xlsx") + "?photos=1")
+        wb = load_workbook(BytesIO(response.content))
+
+        self.assertEqual(len(wb["Fotos"]._images), 3)
+        # logo (local) + 3 fotos
+        self.assertEqual(len(FETCHED), 4)
+
+        self.client.get(reverse("export-xlsx") + "?photos=1")
+        self.assertEqual(len(FETCHED), 4)
+
+    def test_archived_jobs_keep_their_photos(self):
+        archive_jobs(datetime.date(2024, 1, 1))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("export-xlsx") + "?photos=1")
+        self.assertEqual(len(load_workbook(BytesIO(response.content))["Fotos"]._images), 3)
+        self.assertTrue([source for source in FETCHED if "job_photos/old" in source])
+        # límite del archivo (cacheado en el primer pedido), filas y fotos
+        self.assertEqual(len([q for q in queries if "jobs_archivedjob" in q["sql"]]), 3)
+
+    def test_pdf_embeds_photos(self):
+        response = self.client.get(reverse("export_jobs_pdf") + "?photos=1")
+
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(len(FETCHED), 3)
+
+
+# ==============================
+# ANALÍTICA
+# ==============================
+
+class AnalyticsExportTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        poda = Tag.objects.create(name="poda")
+        march = make_job(date=datetime.date(2025, 3, 10), duration=120)  # lunes
+        march.tags.add(poda)
+        JobPhoto.objects.create(job=march, photo="job_photos/a", before_after="before")
+        JobPhoto.objects.create(job=march, photo="job_photos/b", before_after="after")
+        make_job(date=datetime.date(2025, 3, 17), duration=60, location="interior")
+        make_job(date=datetime.date(2024, 12, 2), duration=30).tags.add(poda)
+
+    def test_sheets_and_aggregates(self):
+        # Cuatro agregados + el límite del archivo (vacío: no se lee ArchivedJob)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("export-analytics"))
+        wb = load_workbook(BytesIO(response.content))
+
+        self.assertEqual(wb.sheetnames, [
+            "Horas por mes", "Horas por locación", "Horas por etiqueta",
+            "Día × mes", "Año × mes", "Cobertura de fotos",
+        ])
+        months = list(wb["Horas por mes"].values)
+        self.assertEqual(months[1:], [("Diciembre 2024", 1, 30, 0.5), ("Marzo 2025", 2, 180, 3)])
+
+        tags = list(wb["Horas por etiqueta"].values)
+        self.assertEqual(tags[1], ("#poda", 2, 150, 2.5))
+
+        heatmap = {row[0]: row[1:] for row in wb["Día × mes"].values}
+        self.assertEqual(heatmap["Lunes"][2], 3)  # marzo
+
+        coverage = list(wb["Cobertura de fotos"].values)
+        self.assertEqual(coverage[2], ("Marzo 2025", 2, 1, 1, 1, 50))
+
+
+# ==============================
+# ARCHIVO
+# ==============================
+
+class ArchiveTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.poda = Tag.objects.create(name="poda")
+        self.old = make_job(date=datetime.date(2020, 5, 4), duration=90)
+        self.old.tags.add(self.poda)
+        JobPhoto.objects.create(job=self.old, photo="job_photos/a", before_after="before")
+        make_job(date=datetime.date(2020, 5, 20), duration=30)
+        make_job(date=datetime.date(2021, 1, 8), duration=45)
+        self.recent = make_job(date=datetime.date(2025, 3, 10), duration=60)
+
+    def archive(self):
+        return archive_jobs(datetime.date(2024, 1, 1), batch_size=2)
+
+    def test_cutoff_keeps_whole_months(self):
+        self.assertEqual(archive_cutoff(24, today=datetime.date(2025, 3, 17)), datetime.date(2023, 3, 1))
+        self.assertEqual(archive_cutoff(3, today=datetime.date(2025, 1, 31)), datetime.date(2024, 10, 1))
+
+    def test_moves_old_jobs_and_freezes_monthly_totals(self):
+        totals_before = monthly_totals(self.crew)
+        self.assertEqual(self.archive(), 3)
+
+        self.assertEqual(list(Job.objects.all()), [self.recent])
+        archived = ArchivedJob.objects.get(original_id=self.old.pk)
+        self.assertEqual(archived.tag_names, "poda")
+        self.assertEqual(list(archived.tags.all()), [self.poda])
+        self.assertEqual(archived.photos, [{"photo": "job_photos/a", "before_after": "before"}])
+        self.assertTrue(archived.has_before)
+
+        may = MonthlySummary.objects.get(month=datetime.date(2020, 5, 1))
+        self.assertEqual((may.job_count, may.total_minutes), (2, 120))
+        self.assertEqual(monthly_totals(self.crew), totals_before)
+
+    def test_history_reads_archive_only_when_needed(self):
+        self.archive()
+
+        with self.assertNumQueries(2):  # límite del archivo + tabla caliente
+            recent = list(Job.objects.history(start=datetime.date(2024, 6, 1)))
+        self.assertEqual([row.job_id for row in recent], [self.recent.pk])
+
+        with self.assertNumQueries(1):
+            rows = list(Job.objects.history())
+        self.assertEqual([row.date.year for row in rows], [2025, 2021, 2020, 2020])
+        self.assertEqual([row.job_id for row in rows[1:]], [None, None, None])
+
+        rows = list(Job.objects.history(end=datetime.date(2020, 12, 31)))
+        self.assertEqual(sum(row.duration for row in rows), 120)
+
+    def test_exports_include_archived_jobs(self):
+        self.archive()
+        content = self.client.get(reverse("export-csv")).content.decode()
+        self.assertIn("2020-05-04", content)
+        self.assertIn("2025-03-10", content)
+
+        wb = load_workbook(BytesIO(self.client.get(reverse("export-analytics")).content))
+        tags = list(wb["Horas por etiqueta"].values)
+        self.assertEqual(tags[1], ("#poda", 1, 90, 1.5))
+
+    def test_invalid_dates_are_bad_requests(self):
+        for name in ("export-csv", "export-xlsx"):
+            for query in ("?start=2025-02-30", "?end=2025-13-01"):
+                with self.subTest(export=name, query=query):
+                    self.assertEqual(self.client.get(reverse(name) + query).status_code, 400)
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command("archive_jobs", months=24, dry_run=True, stdout=out)
+        self.assertIn("2020-05: 2 trabajos, 120 min", out.getvalue())
+        self.assertEqual(Job.objects.count(), 4)
+        self.assertFalse(ArchivedJob.objects.exists())
+
+
+# ==============================
+# PERFILADO DE EXPORTACIONES
+# ==============================
+
+class ExportProfilingTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        make_job(duration=30)
+        make_job(duration=45)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def profiling(self, **overrides):
+        config = {**settings.EXPORT_PROFILING, "DIR": self.tmp.name, "SAMPLE_RATE": 0, **overrides}
+        return override_settings(EXPORT_PROFILING=config)
+
+    def test_logs_rows_and_bytes(self):
+        with self.profiling(), self.assertLogs("jobs.exports", "INFO") as logs:
+            response = self.client.get(reverse("export-csv"))
+
+        record = logs.records[0].export
+        self.assertEqual(record["format"], "csv")
+        self.assertEqual(record["rows"], 2)
+        self.assertEqual(record["bytes"], len(response.content))
+        self.assertIsNone(record["profile"])
+        self.assertIn("rows=2", logs.output[0])
+
+    def test_memory_is_traced_only_on_sampled_exports(self):
+        with self.profiling(), self.assertLogs("jobs.exports") as logs:
+            self.client.get(reverse("export-csv"))
+        self.assertIsNone(logs.records[0].export["peak_kb"])
+
+        # Por defecto toda exportación de la muestra mide el pico
+        with self.profiling(SAMPLE_RATE=1, SLOW_MS=60_000), self.assertLogs("jobs.exports") as logs:
+            self.client.get(reverse("export-csv"))
+        self.assertGreater(logs.records[0].export["peak_kb"], 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        with self.profiling(TRACE_MEMORY=False, SAMPLE_RATE=1, SLOW_MS=60_000), self.assertLogs("jobs.exports") as logs:
+            self.client.get(reverse("export-csv"))
+        self.assertIsNone(logs.records[0].export["peak_kb"])
+
+    def test_analytics_and_pdf_measure_their_queries(self):
+        config = {"DIR": self.tmp.name, "FRAGMENTS_MAX_BYTES": 10 * 1024 * 1024, "REPORTS_MAX_BYTES": 10 * 1024 * 1024}
+        with self.profiling(), override_settings(PDF_REPORTS=config), self.assertLogs("jobs.exports") as logs:
+            get_report_engine.cache_clear()
+            self.addCleanup(get_report_engine.cache_clear)
+            self.client.get(reverse("export-analytics"))
+            self.client.get(reverse("export_jobs_pdf"))
+
+        for record in logs.records:
+            self.assertEqual(record.export["rows"], 2, record.export["format"])
+            self.assertGreater(record.export["fetch_ms"], 0, record.export["format"])
+
+    def test_slow_sampled_exports_keep_rotating_dumps(self):
+        with self.profiling(SAMPLE_RATE=1, SLOW_MS=0, KEEP=2), self.assertLogs("jobs.exports") as logs:
+            for _ in range(3):
+                self.client.get(reverse("export-csv"))
+
+        self.assertTrue(logs.records[-1].export["profile"].endswith("_csv.prof"))
+        self.assertEqual(len(list(Path(self.tmp.name).glob("*.prof"))), 2)
+
+    def test_fast_exports_are_not_dumped(self):
+        with self.profiling(SAMPLE_RATE=1, SLOW_MS=60_000), self.assertLogs("jobs.exports"):
+            self.client.get(reverse("export-csv"))
+        self.assertEqual(list(Path(self.tmp.name).glob("*.prof")), [])
+
+
+# ==============================
+# FORMATOS
+# ==============================
+
+class FormattingTests(SimpleTestCase):
+    def test_tables_match_row_by_row_formatting(self):
+        # Incluye valores fuera de la tabla precalculada
+        for minutes in [*range(0, 1500), 10_079, 10_080, 10_081, 250_000]:
+            self.assertEqual(hhmm(minutes), legacy_hhmm(minutes))
+            self.assertEqual(short_duration(minutes), legacy_short(minutes))
+        self.assertEqual(hhmm_column([5, None, 20_000]), ["0h 05m", "0h 00m", "333h 20m"])
+
+    def test_month_labels(self):
+        self.assertEqual(month_label(2025, 3), "Marzo 2025")
+        self.assertEqual(month_label(1999, 12), "Diciembre 1999")
+        days = [datetime.date(2024, 12, 2), datetime.date(2150, 1, 1)]
+        self.assertEqual(month_labels(days), ["Diciembre 2024", "Enero 2150"])
+        self.assertEqual(month_labels(days[:1]), [legacy_month(days[0])])
+
+    def test_month_label_filter(self):
+        template = Template("{% load duration_filters %}{{ month|month_label }}")
+        self.assertEqual(template.render(Context({"month": datetime.date(2025, 3, 1)})), "Marzo 2025")
+
+    def test_date_column(self):
+        days = [datetime.date(2025, 3, 10)] * 2 + [datetime.date(2025, 3, 11)]
+        self.assertEqual(date_column(days, "%d/%m/%Y"), ["10/03/2025", "10/03/2025", "11/03/2025"])
+
+    def test_duration_filter(self):
+        template = Template("{% load duration_filters %}{{ a|duration }}|{{ b|duration }}|{{ c|duration }}")
+        self.assertEqual(template.render(Context({"a": 125, "b": 60, "c": None})), "2h 5m|1h|")
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("bench_formatting", rows=200, stdout=out)
+        self.assertIn("mes en español", out.getvalue())
+
+
+# ==============================
+# CUADRILLAS
+# ==============================
+
+@override_settings(ALLOWED_HOSTS=[".example.com", "localhost", ".onrender.com"], CREW_DOMAIN="example.com")
+class CrewTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.norte = Crew.objects.create(name="Norte", slug="norte", report_author="Ana Pérez")
+        self.own = make_job(description="del-principal", duration=60)
+        self.other = make_job(crew=self.norte, description="de-norte", duration=45)
+
+    def get(self, name, host, *args):
+        return self.client.get(reverse(name, args=args), HTTP_HOST=host)
+
+    def test_subdomain_selects_crew(self):
+        response = self.get("job-list", "norte.example.com")
+        self.assertContains(response, "de-norte")
+        self.assertNotContains(response, "del-principal")
+        self.assertEqual([m["total_minutes"] for m in response.context["monthly_totals"]], [45])
+
+        # Host sin cuadrilla conocida: la por defecto
+        response = self.get("job-list", "www.example.com")
+        self.assertContains(response, "del-principal")
+        self.assertEqual([m["total_minutes"] for m in response.context["monthly_totals"]], [60])
+
+    def test_only_subdomains_of_the_crew_domain_select_a_crew(self):
+        Crew.objects.create(name="App", slug="jardineria")
+        make_job(crew=Crew.objects.get(slug="jardineria"), description="de-la-app")
+
+        # <app>.onrender.com: el nombre de la app no se busca como cuadrilla
+        with mock.patch("jobs.middleware.crew.lookup_crew", wraps=lookup_crew) as lookup:
+            response = self.get("job-list", "jardineria.onrender.com")
+        self.assertContains(response, "del-principal")
+        self.assertNotContains(response, "de-la-app")
+        self.assertEqual([call.args[0] for call in lookup.call_args_list], [settings.DEFAULT_CREW_SLUG])
+
+        self.assertContains(self.get("job-list", "jardineria.example.com"), "de-la-app")
+        self.assertContains(self.get("job-list", "a.jardineria.example.com"), "del-principal")
+
+    def test_other_crews_jobs_are_not_found(self):
+        self.assertEqual(self.get("job-detail", "norte.example.com", self.own.pk).status_code, 404)
+        self.assertEqual(self.get("job-detail", "norte.example.com", self.other.pk).status_code, 200)
+
+    def test_exports_are_scoped_and_signed_by_crew(self):
+        content = self.get("export-csv", "norte.example.com").content.decode()
+        self.assertIn("de-norte", content)
+        self.assertNotIn("del-principal", content)
+
+        wb = load_workbook(BytesIO(self.get("export-xlsx", "norte.example.com").content))
+        self.assertEqual(wb.active["A3"].value, "Ana Pérez")
+
+        wb = load_workbook(BytesIO(self.get("export-analytics", "localhost").content))
+        self.assertEqual(list(wb["Horas por mes"].values)[1:], [("Marzo 2025", 1, 60, 1)])
+
+    def test_crew_lookup_is_cached_and_invalidated(self):
+        self.get("job-list", "norte.example.com")
+        with CaptureQueriesContext(connection) as queries:
+            self.get("job-list", "norte.example.com")
+        self.assertFalse([q for q in queries if "jobs_crew" in q["sql"]])
+
+        self.norte.report_author = "Otra firma"
+        self.norte.save()
+        wb = load_workbook(BytesIO(self.get("export-xlsx", "norte.example.com").content))
+        self.assertEqual(wb.active["A3"].value, "Otra firma")
+
+    def test_renamed_slug_drops_the_old_key(self):
+        self.get("job-list", "norte.example.com")
+        self.norte.slug = "sur"
+        self.norte.save()
+
+        self.assertContains(self.get("job-list", "norte.example.com"), "del-principal")
+        self.assertContains(self.get("job-list", "sur.example.com"), "de-norte")
+
+    def test_unknown_subdomains_are_not_cached(self):
+        self.assertContains(self.get("job-list", "nadie.example.com"), "del-principal")
+        self.assertIsNone(cache.get(crew_cache_key("nadie")))
+
+        # Ni siquiera se consulta la base con algo que no puede ser un slug
+        with self.assertNumQueries(0):
+            self.assertIsNone(lookup_crew("x" * 80))
+            self.assertIsNone(lookup_crew("no.es~slug"))
+
+    def test_building_a_job_does_not_query(self):
+        with self.assertNumQueries(0):
+            Job(date=datetime.date(2025, 3, 1), location="otro", duration=30)
+
+    def test_pdf_cover_escapes_author(self):
+        self.norte.report_author = "Pérez & Hijos <SRL>"
+        self.norte.save()
+        with tempfile.TemporaryDirectory() as directory:
+            config = {"DIR": directory, "FRAGMENTS_MAX_BYTES": 10 * 1024 * 1024, "REPORTS_MAX_BYTES": 10 * 1024 * 1024}
+            with override_settings(PDF_REPORTS=config):
+                get_report_engine.cache_clear()
+                content = self.get("export_jobs_pdf", "norte.example.com").content
+
+        self.assertIn("Pérez & Hijos <SRL>", PdfReader(BytesIO(content)).pages[0].extract_text())
+
+
+# ==============================
+# INFORME PDF POR MESES
+# ==============================
+
+class PdfReportTests(JobsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        config = {"DIR": self.tmp.name, "FRAGMENTS_MAX_BYTES": 10 * 1024 * 1024, "REPORTS_MAX_BYTES": 10 * 1024 * 1024}
+        override = override_settings(PDF_REPORTS=config)
+        override.enable()
+        self.addCleanup(override.disable)
+        get_report_engine.cache_clear()
+        self.addCleanup(get_report_engine.cache_clear)
+
+        self.march = make_job(date=datetime.date(2025, 3, 10), duration=120, description="poda-marzo")
+        make_job(date=datetime.date(2025, 1, 5), duration=30, description="riego-enero")
+        make_job(date=datetime.date(2024, 12, 2), duration=45, description="corte-diciembre")
+
+    def download(self, query=""):
+        with mock.patch("jobs.reports.render_month", wraps=reports.render_month) as render:
+            response = self.client.get(reverse("export_jobs_pdf") + query)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        rendered = [call.args[0] for call in render.call_args_list]
+        return PdfReader(BytesIO(response.content)), rendered
+
+    def text(self, pdf):
+        return "\n".join(page.extract_text() for page in pdf.pages)
+
+    def test_cover_and_one_section_per_month(self):
+        pdf, rendered = self.download()
+        text = self.text(pdf)
+
+        self.assertEqual(len(pdf.pages), 4)
+        self.assertEqual(len(rendered), 3)
+        for expected in ("Lucas Soria", "Marzo 2025", "Diciembre 2024", "poda-marzo", "Total General: 3h 15m"):
+            self.assertIn(expected, text)
+        # Portada primero, meses de más nuevo a más viejo
+        self.assertLess(text.index("poda-marzo"), text.index("riego-enero"))
+
+    def test_finished_report_is_served_from_disk(self):
+        self.download()
+        with self.assertNumQueries(0):
+            _, rendered = self.download()
+        self.assertEqual(rendered, [])
+
+    def test_edit_rebuilds_only_its_month(self):
+        self.download()
+        self.march.description = "poda-editada"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.march.save()
+
+        pdf, rendered = self.download()
+        self.assertEqual(rendered, [datetime.date(2025, 3, 1)])
+        self.assertIn("poda-editada", self.text(pdf))
+
+    def test_moving_a_job_rebuilds_its_new_month(self):
+        self.download()
+        self.march.date = datetime.date(2025, 1, 20)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.march.save()
+
+        # Marzo queda vacío y sale del informe
+        pdf, rendered = self.download()
+        self.assertEqual(rendered, [datetime.date(2025, 1, 1)])
+        self.assertEqual(len(pdf.pages), 3)
+        self.assertNotIn("Marzo 2025", self.text(pdf))
+
+    def test_only_missing_month_runs_are_fetched(self):
+        self.download()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(date=datetime.date(2024, 12, 20), duration=15)
+            self.march.save()
+
+        with mock.patch.object(Job.objects, "history", wraps=Job.objects.history) as history:
+            _, rendered = self.download()
+        self.assertEqual(rendered, [datetime.date(2025, 3, 1), datetime.date(2024, 12, 1)])
+        # Enero no cambió: no se vuelve a leer
+        self.assertEqual(
+            [call.kwargs["ranges"] for call in history.call_args_list],
+            [[
+                (datetime.date(2024, 12, 1), datetime.date(2024, 12, 31)),
+                (datetime.date(2025, 3, 1), datetime.date(2025, 3, 31)),
+            ]],
+        )
+
+    def test_months_are_invalidated_after_commit(self):
+        self.download()
+        before = reports.month_versions(self.crew.pk, [datetime.date(2025, 3, 1)])
+        self.march.duration = 600
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.march.save()
+            # Otro request antes del commit: no debe dejar nada bajo la versión nueva
+            self.download()
+            engine = get_report_engine()
+            stale = [
+                engine.fragment_key(self.crew, month, version + 1, None, None, False)
+                for month, version in before.items()
+            ]
+            self.assertEqual([engine.fragments.get(key, (".pdf",)) for key in stale], [None])
+
+        # Confirmado: la versión cambia y marzo se vuelve a armar con lo nuevo
+        pdf, rendered = self.download()
+        self.assertEqual(rendered, [datetime.date(2025, 3, 1)])
+        self.assertIn("10h 00m", self.text(pdf))
+
+    def test_invalid_dates_are_bad_requests(self):
+        for query in ("?start=2025-02-30", "?end=2025-13-01"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(reverse("export_jobs_pdf") + query).status_code, 400)
+
+    def test_range_clips_months(self):
+        pdf, rendered = self.download("?start=2025-01-01")
+        text = self.text(pdf)
+        self.assertIn("riego-enero", text)
+        self.assertNotIn("corte-diciembre", text)
+        self.assertIn("Total General: 2h 30m", text)
+
+
+# ==============================
+# CACHE DE CÁLCULOS
+# ==============================
+
+class CachedComputationTests(JobsTestCase):
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        barrier = threading.Barrier(8)
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.3)
+            return "valor"
+
+        def worker():
+            barrier.wait()
+            results.append(cached("concurrente", compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["valor"] * 8)
+
+    def test_serves_stale_while_other_worker_recomputes(self):
+        cached("stale", lambda: "viejo", ttl=60)
+        # Otro worker tiene el lock
+        cache.add(f"computed:stale:v{data_version()}:lock", 1)
+        stale_before = cache_metrics().get("stale", 0)
+
+        with mock.patch("jobs.cache.time.time", return_value=time.time() + 120):
+            value = cached("stale", lambda: "nuevo", ttl=60)
+
+        self.assertEqual(value, "viejo")
+        self.assertEqual(cache_metrics()["stale"], stale_before + 1)
+
+    def test_expired_entry_is_recomputed_by_lock_holder(self):
+        cached("refresh", lambda: "viejo", ttl=60)
+
+        with mock.patch("jobs.cache.time.time", return_value=time.time() + 120):
+            value = cached("refresh", lambda: "nuevo", ttl=60)
+
+        self.assertEqual(value, "nuevo")
+
+    def test_data_changes_invalidate(self):
+        self.assertEqual(cached("totales", lambda: 1), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job()
+        self.assertEqual(cached("totales", lambda: 2), 2)
+
+    def test_version_changes_only_after_commit(self):
+        version = data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job()
+            with bulk_changes():
+                make_job()
+            # Un recálculo antes del commit queda bajo la versión vieja
+            self.assertEqual(data_version(), version)
+        self.assertGreater(data_version(), version)
+
+
+# ==============================
+# CACHE COMPARTIDA (SQLite)
+# ==============================
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+        self.cache = SQLiteCache(self.path, {})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_basic_operations(self):
+        self.cache.set("dict", {"a": 1})
+        self.cache.set("flag", True)
+        self.assertEqual(self.cache.get("dict"), {"a": 1})
+        self.assertIs(self.cache.get("flag"), True)
+
+        self.assertFalse(self.cache.add("dict", "otro"))
+        self.assertTrue(self.cache.add("nuevo", 1))
+        self.assertTrue(self.cache.delete("nuevo"))
+        self.assertIsNone(self.cache.get("nuevo"))
+
+    def test_expired_entries(self):
+        self.cache.set("vence", 1, timeout=60)
+        with mock.patch("jobs.cache_backends.time.time", return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get("vence"))
+            self.assertTrue(self.cache.add("vence", 2))
+            with self.assertRaises(ValueError):
+                self.cache.incr("no-existe")
+
+    def test_incr_is_atomic_across_connections(self):
+        self.cache.set("contador", 0)
+
+        def worker():
+            # Otra instancia = otra conexión, como otro worker de gunicorn
+            other = SQLiteCache(self.path, {})
+            for _ in range(50):
+                other.incr("contador")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.get("contador"), 200)
+
+
+class RateLimitTests(JobsTestCase):
+    @override_settings(RATE_LIMIT_REQUESTS=3)
+    def test_limit_is_enforced(self):
+        codes = [self.client.get(reverse("health_check")).status_code for _ in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
+
+
+# ==============================
+# RÉPLICA DE LECTURA
+# ==============================
+
+@override_settings(DATABASE_READ_REPLICA="replica")
+class ReadReplicaRoutingTests(JobsTestCase):
+    """Dos SQLite de test: `default` (primario) y `replica`, con datos distintos."""
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        super().setUp()
+        make_job(description="solo-en-primario")
+        Job.objects.using("replica").create(
+            crew_id=self.crew.pk,
+            date=datetime.date(2025, 3, 1), location="otro", duration=30, description="solo-en-replica",
+        )
+
+    def test_list_reads_from_replica(self):
+        response = self.client.get(reverse("job-list"))
+
+        self.assertContains(response, "solo-en-replica")
+        self.assertNotContains(response, "solo-en-primario")
+
+    def test_exports_read_from_replica(self):
+        content = self.client.get(reverse("export-csv")).content.decode()
+
+        self.assertIn("solo-en-replica", content)
+
+    def test_pdf_fragments_read_from_primary(self):
+        # Los fragmentos no vencen: no pueden quedar armados desde la réplica
+        with tempfile.TemporaryDirectory() as directory:
+            config = {"DIR": directory, "FRAGMENTS_MAX_BYTES": 10 * 1024 * 1024, "REPORTS_MAX_BYTES": 10 * 1024 * 1024}
+            with override_settings(PDF_REPORTS=config):
+                get_report_engine.cache_clear()
+                self.addCleanup(get_report_engine.cache_clear)
+                content = self.client.get(reverse("export_jobs_pdf")).content
+
+        text = "\n".join(page.extract_text() for page in PdfReader(BytesIO(content)).pages)
+        self.assertIn("solo-en-primario", text)
+        self.assertNotIn("solo-en-replica", text)
+
+    def test_cached_computations_read_from_primary(self):
+        token = replica_allowed.set(True)
+        self.addCleanup(replica_allowed.reset, token)
+        descriptions = lambda: list(Job.objects.values_list("description", flat=True))
+
+        with replica_reads():
+            self.assertEqual(descriptions(), ["solo-en-replica"])
+            self.assertEqual(cached("descripciones", descriptions), ["solo-en-primario"])
+
+    def test_write_makes_client_sticky_to_primary(self):
+        response = self.client.post(reverse("job-list"))
+        self.assertIn("primary_until", response.cookies)
+
+        response = self.client.get(reverse("job-list"))
+        self.assertContains(response, "solo-en-primario")
+
+    def test_writes_and_unmarked_reads_use_primary(self):
+        self.assertEqual(Job.objects.filter(description="solo-en-primario").count(), 1)
+        self.assertEqual(make_job()._state.db, "default")
+
+    @override_settings(DATABASE_READ_REPLICA=None)
+    def test_without_replica_everything_uses_primary(self):
+        response = self.client.get(reverse("job-list"))
+
+        self.assertContains(response, "solo-en-primario")
+        self.assertNotIn("primary_until", self.client.post(reverse("job-list")).cookies)
@@ -1,11 +1,21 @@
 from django.conf import settings
+from django.core.exceptions import BadRequest
 from django.shortcuts import render
 from django.views.generic import ListView, DetailView
 from django.views.decorators.cache import never_cache
-from django.db.models import Sum
-from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+from django.utils.http import urlencode
 from django.utils.timezone import now
-from .models import Job
+from .analytics import analytics_stats, build_analytics_workbook
+from .archive import add_months, monthly_totals
+from .cache import cache_metrics, cached
+from .db import StatementTimeoutMixin, pool_stats, with_statement_timeout
+from .image_cache import get_image_cache
+from .formatting import date_column, hhmm, hhmm_column, hours_minutes, month_label
+from .models import Job, Location
+from .profiling import profiled_export
+from .reports import REPORT_PHOTO_SIZE, get_report_engine, report_photos
+from .tags import crew_tag_stats, filter_by_tags, related_tags
 import os
 
 # Exportar a Excel / CSV
@@ -16,11 +26,6 @@ from openpyxl.drawing.image import Image as XLImage
 from openpyxl.styles import Font, Alignment
 from datetime import datetime
 
-# Exportar a PDF
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from io import BytesIO
 
 
@@ -28,10 +33,53 @@ from io import BytesIO
 # Helpers
 # ==============================
 
-def format_minutes(total_minutes):
-    hours = total_minutes // 60
-    minutes = total_minutes % 60
-    return hours, minutes
+# Tamaño del logo en los reportes (px)
+LOGO_SIZE = (80, 80)
+
+
+def logo_thumbnail():
+    logo_path = os.path.join(settings.BASE_DIR, "static/img/logo.png")
+    return get_image_cache().thumbnail(logo_path, LOGO_SIZE)
+
+
+def wants_photos(request):
+    return request.GET.get("photos") == "1"
+
+
+LOCATIONS = dict(Location.choices)
+
+
+def export_range(request):
+    """
+    (start, end) de ?start=AAAA-MM-DD&end=AAAA-MM-DD, None si falta. Una
+    fecha bien escrita pero inexistente (2025-02-30) es un 400, no un 500.
+    """
+    try:
+        return (
+            parse_date(request.GET.get("start") or ""),
+            parse_date(request.GET.get("end") or ""),
+        )
+    except ValueError:
+        raise BadRequest("Fecha inválida")
+
+
+def export_jobs(request):
+    """
+    Trabajos a exportar (ver export_range). Sólo se lee el archivo si el
+    rango llega a meses archivados (ver jobs/archive.py).
+    """
+    start, end = export_range(request)
+    return Job.objects.history(start, end, crew=request.crew)
+
+
+def fetch_export_jobs(request):
+    """export_jobs() evaluado, midiendo la query en el perfil de la exportación."""
+    profile = request.export_profile
+    with profile.fetching():
+        jobs = list(export_jobs(request))
+    profile.rows = len(jobs)
+    return jobs
+
 
 # Application startup time for health check
 APP_STARTED_AT = now()
@@ -40,30 +88,61 @@ APP_STARTED_AT = now()
 def health_check(request):
     uptime = (now() - APP_STARTED_AT).total_seconds()
 
-    return JsonResponse({
+    data = {
         "status": "ok",
         "uptime": uptime,
         "cold": uptime < 5  # cold start hardcoded
-    },
-    status=200
-)
-
-
-# Diccionario para traducir meses al español
-MESES_ES = {
-    "January": "Enero",
-    "February": "Febrero",
-    "March": "Marzo",
-    "April": "Abril",
-    "May": "Mayo",
-    "June": "Junio",
-    "July": "Julio",
-    "August": "Agosto",
-    "September": "Septiembre",
-    "October": "Octubre",
-    "November": "Noviembre",
-    "December": "Diciembre"
-}
+    }
+
+    # Saturación del pool de conexiones (sólo si DB_POOL está activo)
+    db_pool = pool_stats()
+    if db_pool is not None:
+        data["db_pool"] = db_pool
+
+    # hit / miss / stale de los cálculos cacheados en este worker
+    data["cache"] = cache_metrics()
+
+    return JsonResponse(data, status=200)
+
+
+def compute_monthly_totals(crew):
+    # Meses archivados desde MonthlySummary + agregado de la tabla caliente
+    totals = monthly_totals(crew)
+
+    for item in totals:
+        hours, minutes = hours_minutes(item["total_minutes"])
+        item["hours"] = hours
+        item["minutes"] = minutes
+
+    return totals
+
+
+def crew_monthly_totals(crew):
+    """Totales mensuales de la cuadrilla, cacheados (ver jobs/cache.py)."""
+    return cached(f"monthly_totals:{crew.pk}", lambda: compute_monthly_totals(crew))
+
+
+def cached_tag_stats(crew):
+    """Trabajos y minutos por etiqueta (TagStat), cacheados (ver jobs/cache.py)."""
+    return cached(f"tag_stats:{crew.pk}", lambda: crew_tag_stats(crew))
+
+
+def selected_tags(request):
+    """(?tag=poda&tag=riego, todas) — mode=or pide cualquiera de ellas."""
+    names = []
+    for name in request.GET.getlist("tag"):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names, request.GET.get("mode") != "or"
+
+
+def tag_query(names, match_all=True):
+    """Query string del listado filtrado por `names`."""
+    params = [("tag", name) for name in names]
+    if not match_all and len(names) > 1:
+        params.append(("mode", "or"))
+    return urlencode(params)
 
 
 # ==============================
@@ -74,34 +153,71 @@ def splash(request):
     return render(request, "splash.html")
 
 
-class JobListView(ListView):
+class CrewQuerysetMixin:
+    """Sólo los trabajos de la cuadrilla del request (ver CrewMiddleware)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(crew=self.request.crew)
+
+
+class JobListView(CrewQuerysetMixin, StatementTimeoutMixin, ListView):
     model = Job
     template_name = 'job_list.html'
     context_object_name = 'jobs'
     paginate_by = 10
 
+    # Etiquetas en la nube del listado
+    TAG_CLOUD_SIZE = 20
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        self.tags, self.match_all = selected_tags(self.request)
+        if self.tags:
+            queryset = filter_by_tags(queryset, self.tags, self.match_all)
+        return queryset
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        crew = self.request.crew
+        tags, match_all = self.tags, self.match_all
 
-        # Agrupación mensual
-        monthly_totals = (
-            Job.objects
-            .annotate(month=TruncMonth('date'))
-            .values('month')
-            .annotate(total_minutes=Sum('duration'))
-            .order_by('-month')
-        )
-
-        for item in monthly_totals:
-            hours, minutes = format_minutes(item["total_minutes"])
-            item["hours"] = hours
-            item["minutes"] = minutes
+        # Agrupación mensual (cacheada, ver jobs/cache.py)
+        monthly_totals = crew_monthly_totals(crew)
 
         context['monthly_totals'] = monthly_totals
+
+        # Horas por etiqueta desde TagStat: no se recorre la tabla de trabajos
+        stats = {stat["name"]: stat for stat in cached_tag_stats(crew)}
+        context['tag_cloud'] = [
+            {**stat, "query": tag_query([stat["name"]])}
+            for stat in list(stats.values())[:self.TAG_CLOUD_SIZE]
+        ]
+        context['tag_filter'] = [
+            {
+                "name": name,
+                "job_count": stats.get(name, {}).get("job_count", 0),
+                "total_minutes": stats.get(name, {}).get("total_minutes", 0),
+                "remove_query": tag_query([other for other in tags if other != name], match_all),
+            }
+            for name in tags
+        ]
+        context['match_all'] = match_all
+        context['filter_query'] = tag_query(tags, match_all)
+        if len(tags) > 1:
+            context['mode_queries'] = {
+                "and": tag_query(tags, True),
+                "or": tag_query(tags, False),
+            }
+        if tags:
+            # Sugerencias desde TagPair (co-ocurrencias mantenidas por señales)
+            context['related_tags'] = [
+                {"name": name, "job_count": together, "query": tag_query(tags + [name], match_all)}
+                for name, together in related_tags(crew, tags)
+            ]
         return context
 
 
-class JobDetailView(DetailView):
+class JobDetailView(CrewQuerysetMixin, StatementTimeoutMixin, DetailView):
     model = Job
     template_name = 'job_detail.html'
     context_object_name = 'job'
@@ -110,12 +226,15 @@ class JobDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         job = self.object
 
-        hours, minutes = format_minutes(self.object.duration)
+        hours, minutes = hours_minutes(self.object.duration)
         context["duration_hours"] = hours
         context["duration_minutes"] = minutes
 
-        context["has_before"] = job.photos.filter(before_after='before').exists()
-        context["has_after"] = job.photos.filter(before_after='after').exists()
+        context["photos"] = list(job.photos.all())
+
+        # Resumen desnormalizado en Job (ver jobs/signals.py)
+        context["has_before"] = job.has_before
+        context["has_after"] = job.has_after
         context["has_both"] = (
             context["has_before"] and context["has_after"]
         )
@@ -127,6 +246,8 @@ class JobDetailView(DetailView):
 # EXPORTAR CSV
 # ==============================
 
+@with_statement_timeout("export")
+@profiled_export("csv")
 def export_jobs_csv(request):
     response = HttpResponse(content_type='text/csv')
     filename = f"trabajos_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
@@ -135,10 +256,10 @@ def export_jobs_csv(request):
     writer = csv.writer(response)
     writer.writerow(['Fecha', 'Locación', 'Duración (min)', 'Descripción'])
 
-    for job in Job.objects.order_by('-date'):
+    for job in fetch_export_jobs(request):
         writer.writerow([
             job.date,
-            job.get_location_display(),
+            LOCATIONS.get(job.location, job.location),
             job.duration,
             job.description,
         ])
@@ -150,6 +271,8 @@ def export_jobs_csv(request):
 # EXPORTAR XLSX
 # ==============================
 
+@with_statement_timeout("export")
+@profiled_export("xlsx")
 def export_jobs_xlsx(request):
     wb = Workbook()
     ws = wb.active
@@ -171,14 +294,12 @@ def export_jobs_xlsx(request):
 
     # Mes y año (según fecha actual)
     now = datetime.now()
-    mes_en = now.strftime("%B")
-    mes_es = MESES_ES.get(mes_en, mes_en)
-    mes_anio = f"{mes_es} {now.strftime('%Y')}"
+    mes_anio = month_label(now.year, now.month)
 
     ws["A2"] = f'Informe de trabajos realizados – {mes_anio}'
     ws["A2"].font = subtitle_font
 
-    ws["A3"] = "Lucas Soria"
+    ws["A3"] = request.crew.report_author or request.crew.name
     ws["A3"].font = bold_font
 
     ws["A4"] = f"Fecha de descarga: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
@@ -186,8 +307,9 @@ def export_jobs_xlsx(request):
     # ==========================
     # LOGO
     # ==========================
-    logo_path = os.path.join(settings.BASE_DIR, "static/img/logo.png")
-    if os.path.exists(logo_path):
+    # Miniatura cacheada en disco: no se decodifica el PNG original en cada exportación
+    logo_path = logo_thumbnail()
+    if logo_path:
         logo = XLImage(logo_path)
         logo.width = 80
         logo.height = 80
@@ -211,22 +333,22 @@ def export_jobs_xlsx(request):
     # ==========================
     # DATOS
     # ==========================
-    total_minutos = 0
+    jobs = fetch_export_jobs(request)
 
-    def minutos_a_horas(mins):
-        horas = mins // 60
-        minutos = mins % 60
-        return f"{horas}h {minutos:02d}m"
+    # Columnas formateadas de una pasada (ver jobs/formatting.py)
+    minutes = [job.duration for job in jobs]
+    dates = date_column((job.date for job in jobs), "%Y-%m-%d")
+    durations = hhmm_column(minutes)
 
-    for job in Job.objects.order_by('-date'):
+    for job, date_str, duration_str in zip(jobs, dates, durations):
         ws.append([
-            job.date.strftime("%Y-%m-%d"),
-            job.get_location_display(),
+            date_str,
+            LOCATIONS.get(job.location, job.location),
             job.duration,
-            minutos_a_horas(job.duration),
+            duration_str,
             job.description,
         ])
-        total_minutos += job.duration
+    total_minutos = sum(minutes)
 
     for row in range(start_table_row + 1, ws.max_row + 1):
         ws[f"D{row}"].alignment = right_align
@@ -235,7 +357,7 @@ def export_jobs_xlsx(request):
     # TOTAL
     # ==========================
     ws.append([])
-    ws.append(["", "TOTAL", total_minutos, minutos_a_horas(total_minutos), ""])
+    ws.append(["", "TOTAL", total_minutos, hhmm(total_minutos), ""])
 
     total_row = ws.max_row
 
@@ -256,6 +378,14 @@ def export_jobs_xlsx(request):
     ws.column_dimensions["D"].width = 20
     ws.column_dimensions["E"].width = 40
 
+    # ==========================
+    # FOTOS ANTES / DESPUÉS (?photos=1)
+    # ==========================
+    if wants_photos(request):
+        with request.export_profile.fetching():
+            photos = report_photos(jobs)
+        add_photos_sheet(wb, jobs, photos)
+
     # ==========================
     # RESPUESTA HTTP
     # ==========================
@@ -269,194 +399,90 @@ def export_jobs_xlsx(request):
     return response
 
 
-# ==============================
-# EXPORTAR PDF
-# ==============================
-
-def export_jobs_pdf(request):
-    buffer = BytesIO()
+def add_photos_sheet(wb, jobs, photos):
+    ws = wb.create_sheet("Fotos")
+    ws.append(["Fecha", "Descripción", "Antes", "Después"])
+    for col in range(1, 5):
+        ws.cell(row=1, column=col).font = Font(bold=True)
 
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=36,
-        leftMargin=36,
-        topMargin=36,
-        bottomMargin=36
-    )
-
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # ==========================
-    # COLORES
-    # ==========================
-    PRIMARY_COLOR = colors.HexColor("#045C7C")
-
-    # ==========================
-    # ESTILOS PERSONALIZADOS
-    # ==========================
-    styles.add(ParagraphStyle(
-        name="TitleCustom",
-        fontSize=18,
-        leading=22,
-        textColor=PRIMARY_COLOR,
-        spaceAfter=12,
-        alignment=1  # center
-    ))
-
-    styles.add(ParagraphStyle(
-        name="SubtitleCustom",
-        fontSize=11,
-        italic=True,
-        spaceAfter=8,
-        alignment=1
-    ))
-
-    styles.add(ParagraphStyle(
-        name="Meta",
-        fontSize=10,
-        spaceAfter=6,
-        alignment=1
-    ))
-
-    styles.add(ParagraphStyle(
-        name="SectionTitle",
-        fontSize=14,
-        textColor=PRIMARY_COLOR,
-        spaceBefore=16,
-        spaceAfter=8
-    ))
-
-    styles.add(ParagraphStyle(
-    name="TableDescription",
-    fontSize=9,
-    leading=12,
-    ))
-
-    # ==========================
-    # PORTADA
-    # ==========================
-    elements.append(
-        Paragraph("Mantenimiento de Espacios Verdes", styles["TitleCustom"])
-    )
-
-    now = datetime.now()
-    mes_en = now.strftime("%B")
-    mes_es = MESES_ES.get(mes_en, mes_en)
-
-    elements.append(
-        Paragraph(
-            f"Informe de trabajos realizados – {mes_es} {now.strftime('%Y')}",
-            styles["SubtitleCustom"]
-        )
-    )
-
-    elements.append(Paragraph("Lucas Soria", styles["Meta"]))
-    elements.append(
-        Paragraph(
-            f"Fecha de descarga: {now.strftime('%d/%m/%Y %H:%M')}",
-            styles["Meta"]
-        )
-    )
-
-    elements.append(Spacer(1, 20))
-
-    # ==========================
-    # TABLA DE TRABAJOS
-    # ==========================
-    jobs = Job.objects.all().order_by("-date")
-
-    data = [["Fecha", "Descripción", "Duración"]]
-
-    total_minutes_all = 0
+    ws.column_dimensions["A"].width = 14
+    ws.column_dimensions["B"].width = 40
+    ws.column_dimensions["C"].width = 36
+    ws.column_dimensions["D"].width = 36
 
     for job in jobs:
-        dur = int(job.duration) if job.duration else 0
-        total_minutes_all += dur
+        if job not in photos:
+            continue
 
-        desc_text = job.description or "N/A"
+        ws.append([job.date.strftime("%Y-%m-%d"), job.description])
+        row = ws.max_row
+        ws.row_dimensions[row].height = REPORT_PHOTO_SIZE[1] * 0.75  # px → puntos
 
-        data.append([
-            job.date.strftime("%d/%m/%Y"),
-            Paragraph(desc_text, styles["TableDescription"]),
-            f"{dur // 60}h {dur % 60:02d}m"
-        ])
+        for column, kind in (("C", "before"), ("D", "after")):
+            if kind in photos[job]:
+                ws.add_image(XLImage(photos[job][kind]), f"{column}{row}")
 
-    table = Table(data, colWidths=[80, 300, 80])
-    table.setStyle(TableStyle([
-        # Header
-        ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_COLOR),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
 
-        # Body
-        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-    ]))
+# ==============================
+# EXPORTAR ANALÍTICA (XLSX)
+# ==============================
 
-    elements.append(table)
+@with_statement_timeout("export")
+@profiled_export("analytics")
+def export_jobs_analytics(request):
+    # Cuatro consultas agregadas, sin recorrer trabajos en Python.
+    # Se cachean los bytes: el libro sólo cambia cuando cambian los datos.
+    crew = request.crew
+    profile = request.export_profile
+    export = cached(f"analytics_export:{crew.pk}", lambda: build_analytics_xlsx(crew, profile))
+    profile.rows = export["rows"]
 
-    # ==========================
-    # TOTALES MENSUALES
-    # ==========================
-    monthly_totals = (
-        Job.objects
-        .annotate(month=TruncMonth("date"))
-        .values("month")
-        .annotate(total_minutes=Sum("duration"))
-        .order_by("-month")
+    response = HttpResponse(
+        export["content"],
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
+    filename = f"analitica_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
-    if monthly_totals:
-        elements.append(Spacer(1, 16))
-        elements.append(Paragraph("Totales Mensuales", styles["SectionTitle"]))
-
-        for item in monthly_totals:
-            month = item["month"]
-            total_minutes = item["total_minutes"] or 0
-
-            h = total_minutes // 60
-            m = total_minutes % 60
 
-            mes_en = month.strftime("%B")
-            mes_es = MESES_ES.get(mes_en, mes_en)
-            month_str = f"{mes_es} {month.strftime('%Y')}"
+def build_analytics_xlsx(crew, profile):
+    """{"content": bytes, "rows": trabajos agregados}; las queries cuentan como fetch."""
+    with profile.fetching():
+        stats = analytics_stats(crew)
+    buffer = BytesIO()
+    build_analytics_workbook(stats=stats).save(buffer)
+    months = stats[0]
+    return {"content": buffer.getvalue(), "rows": sum(item["jobs"] for item in months)}
 
-            elements.append(
-                Paragraph(
-                    f"<b>{month_str}:</b> {h}h {m:02d}m",
-                    styles["Normal"]
-                )
-            )
 
-    # ==========================
-    # TOTAL GENERAL
-    # ==========================
-    if total_minutes_all > 0:
-        h = total_minutes_all // 60
-        m = total_minutes_all % 60
-
-        elements.append(Spacer(1, 10))
-        elements.append(
-            Paragraph(
-                f"Total General: {h}h {m:02d}m",
-                styles["SectionTitle"]
-            )
-        )
+# ==============================
+# EXPORTAR PDF
+# ==============================
 
-    # ==========================
-    # CONSTRUIR PDF
-    # ==========================
-    doc.build(elements)
+@with_statement_timeout("export")
+@profiled_export("pdf")
+def export_jobs_pdf(request):
+    # Portada + un fragmento cacheado por mes (ver jobs/reports.py): después
+    # de editar un trabajo sólo se vuelve a diagramar su mes
+    crew = request.crew
+    start, end = export_range(request)
+
+    with request.export_profile.fetching():
+        totals = crew_monthly_totals(crew)
+    months = [
+        item["month"] for item in totals
+        if (not start or add_months(item["month"], 1) > start) and (not end or item["month"] <= end)
+    ]
+    content = get_report_engine().report(
+        crew, months, start, end,
+        photos=wants_photos(request),
+        profile=request.export_profile,
+    )
 
-    buffer.seek(0)
-    response = HttpResponse(buffer, content_type='application/pdf')
+    response = HttpResponse(content, content_type='application/pdf')
     response['Content-Disposition'] = (
-        f'attachment; filename="trabajos_{now.strftime("%Y%m%d_%H%M")}.pdf"'
+        f'attachment; filename="trabajos_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf"'
     )
 
-    return response
\ No newline at end of file
+    return response